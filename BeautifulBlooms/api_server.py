@@ -0,0 +1,289 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import asyncio
+import json
+
+from main import (ORDER_TRANSITIONS, add_storage_arguments, delivery_day, open_storage, order_from_import_row,
+                  storage_capacity)
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+
+
+class ApiError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def product_to_dict(product):
+    return {
+        "code": product.code,
+        "name": product.name,
+        "category": product.category,
+        "price": product.price,
+        "status": product.status,
+        "rating": round(product.rating, 2),
+        "rating_count": product.rating_count
+    }
+
+
+def addon_to_dict(addon):
+    return {"code": addon.code, "name": addon.name, "price": addon.price, "status": addon.status}
+
+
+def order_to_dict(order):
+    return {
+        "order_id": order.order_id,
+        "status": order.status,
+        "item_code": order.product.code,
+        "addon_code": order.addon.code if order.addon else None,
+        "customer_name": order.customer_name,
+        "recipient_name": order.recipient_name,
+        "message": order.message,
+        "delivery": order.is_delivery,
+        "delivery_address": order.delivery_address,
+        "delivery_date": order.delivery_date,
+        "same_day": order.same_day,
+        "created_date": order.created_date.isoformat(timespec="seconds"),
+        "product_price": order.product_price,
+        "addon_price": order.addon_price,
+        "total": order.total
+    }
+
+
+class BloomsApi:
+
+    def __init__(self, products, addons, orders):
+        self.products = products
+        self.addons = addons
+        self.orders = orders
+        self.model_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="blooms-model")
+
+    def refresh(self):
+        self.products.refresh()
+        self.addons.refresh()
+        self.orders.refresh()
+        self.orders.deliver_due()
+
+    def run_model(self, function, *args):
+        self.refresh()
+        return function(*args)
+
+    async def call_model(self, function, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.model_executor, self.run_model, function, *args)
+
+    def list_products(self, query):
+        if "q" in query:
+            return [product_to_dict(product) for product in self.products.search(query["q"])]
+        category = query.get("category")
+        sort_by = query.get("sort")
+        if sort_by not in (None, "price", "rating"):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "sort must be 'price' or 'rating'")
+        return [product_to_dict(product) for product in self.products.available(category, sort_by)]
+
+    def get_product(self, code):
+        product = self.products.get(code.upper())
+        if product is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Product code '{code}' not found")
+        return product_to_dict(product)
+
+    def list_addons(self, query):
+        return [addon_to_dict(addon) for addon in self.addons.values() if addon.status == "Available"]
+
+    def list_orders(self, query):
+        if "q" in query:
+            return [order_to_dict(order) for order in self.orders.search(query["q"])]
+        return [order_to_dict(order) for order in self.orders.with_status(query.get("status", "Open"))]
+
+    def list_deliveries(self, query):
+        day = None
+        if "date" in query:
+            ordinal = delivery_day(query["date"])
+            if ordinal is None:
+                raise ApiError(HTTPStatus.BAD_REQUEST, "date must be DD/MM/YYYY")
+            day = date.fromordinal(ordinal)
+        if query.get("overdue") == "1":
+            return [order_to_dict(order) for order in self.orders.overdue_deliveries(day)]
+        return [order_to_dict(order) for order in self.orders.delivery_queue(day)]
+
+    def get_order(self, order_id):
+        order = self.orders.get(order_id.upper())
+        if order is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Order '{order_id}' not found")
+        return order_to_dict(order)
+
+    def create_order(self, body):
+        try:
+            order = order_from_import_row(self.products, self.addons, body)
+        except ValueError as e:
+            raise ApiError(HTTPStatus.UNPROCESSABLE_ENTITY, str(e))
+        error = self.orders.book(order)
+        if error:
+            raise ApiError(HTTPStatus.CONFLICT, error)
+        return order_to_dict(order)
+
+    def change_status(self, order_id, body):
+        order = self.orders.get(order_id.upper())
+        if order is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Order '{order_id}' not found")
+
+        if self.orders.is_archived(order.order_id):
+            raise ApiError(HTTPStatus.CONFLICT, f"Order '{order.order_id}' is archived and cannot be changed")
+
+        new_status = body.get("status")
+        allowed = ORDER_TRANSITIONS.get(order.status, [])
+
+        if new_status not in allowed:
+            raise ApiError(HTTPStatus.CONFLICT,
+                           f"Cannot change order from '{order.status}' to '{new_status}'; allowed: {allowed}")
+        if order.status == "Cancelled":
+            error = self.orders.capacity_error(order)
+            if error:
+                raise ApiError(HTTPStatus.CONFLICT, error)
+        error = order.update_status(new_status)
+        if error:
+            raise ApiError(HTTPStatus.CONFLICT, error)
+        return order_to_dict(order)
+
+    def route(self, method, path, query, body):
+        parts = [part for part in path.split("/") if part]
+
+        if method == "GET" and parts == ["products"]:
+            return HTTPStatus.OK, self.list_products, (query,)
+        if method == "GET" and len(parts) == 2 and parts[0] == "products":
+            return HTTPStatus.OK, self.get_product, (parts[1],)
+        if method == "GET" and parts == ["addons"]:
+            return HTTPStatus.OK, self.list_addons, (query,)
+        if method == "GET" and parts == ["orders"]:
+            return HTTPStatus.OK, self.list_orders, (query,)
+        if method == "GET" and parts == ["deliveries"]:
+            return HTTPStatus.OK, self.list_deliveries, (query,)
+        if method == "POST" and parts == ["orders"]:
+            return HTTPStatus.CREATED, self.create_order, (body,)
+        if method == "GET" and len(parts) == 2 and parts[0] == "orders":
+            return HTTPStatus.OK, self.get_order, (parts[1],)
+        if method == "POST" and len(parts) == 3 and parts[0] == "orders" and parts[2] == "status":
+            return HTTPStatus.OK, self.change_status, (parts[1], body)
+
+        raise ApiError(HTTPStatus.NOT_FOUND, f"No route for {method} {path}")
+
+    async def handle_request(self, method, target, body_bytes):
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        body = {}
+        if body_bytes:
+            try:
+                body = json.loads(body_bytes)
+            except ValueError:
+                raise ApiError(HTTPStatus.BAD_REQUEST, "Request body must be JSON")
+            if not isinstance(body, dict):
+                raise ApiError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object")
+
+        status, handler, args = self.route(method, url.path, query, body)
+        return status, await self.call_model(handler, *args)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self.write_response(writer, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE,
+                                              {"error": "Request headers too large"}, False)
+                    break
+
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = request_line.split(" ")
+                except ValueError:
+                    await self.write_response(writer, HTTPStatus.BAD_REQUEST, {"error": "Malformed request"}, False)
+                    break
+
+                headers = {}
+                for line in header_lines:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                if "transfer-encoding" in headers:
+                    await self.write_response(writer, HTTPStatus.NOT_IMPLEMENTED,
+                                              {"error": "Transfer-Encoding is not supported; send Content-Length"},
+                                              False)
+                    break
+                length = headers.get("content-length") or "0"
+                if not (length.isascii() and length.isdigit()):
+                    await self.write_response(writer, HTTPStatus.BAD_REQUEST,
+                                              {"error": "Invalid Content-Length"}, False)
+                    break
+                length = int(length)
+                if length > MAX_BODY_BYTES:
+                    await self.write_response(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                              {"error": "Request body too large"}, False)
+                    break
+                body_bytes = await reader.readexactly(length) if length else b""
+
+                try:
+                    status, payload = await self.handle_request(method.upper(), target, body_bytes)
+                except ApiError as e:
+                    status, payload = e.status, {"error": e.message}
+                except Exception as e:
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+
+                await self.write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def write_response(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode("utf-8")
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        print(f"✓ Beautiful Blooms API listening on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Beautiful Blooms local HTTP/JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    add_storage_arguments(parser)
+    args = parser.parse_args()
+
+    storage = open_storage(args.storage, args.database, args.archive_after, storage_capacity(args))
+    products = storage.load_products()
+    addons = storage.load_addons()
+    orders = storage.load_orders(products, addons)
+
+    api = BloomsApi(products, addons, orders)
+    try:
+        asyncio.run(api.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n✓ API server stopped")
+    finally:
+        api.model_executor.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+from array import array
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+import argparse
+import builtins
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from main import (PAGE_SIZE, STARTUP_BUDGET, Addon, CatalogFile, Order, Product, TextStorage, build_order_index,
+                  display_products, addon_record_fields, format_order_id, product_record_fields, load_addons,
+                  load_orders, load_products, open_session, order_number, order_to_record, save_order_index,
+                  save_products)
+from main import main as run_app
+
+CATEGORY_PREFIXES = {
+    "Romantic": "R",
+    "Birthday": "B",
+    "Grand Opening": "GO",
+    "Condolence": "C",
+    "Anniversary": "A"
+}
+ORDER_STATUSES = ("Open", "Open", "Preparing", "Ready", "Closed", "Closed", "Closed", "Cancelled")
+
+
+class DictOrder:
+
+    def __init__(self, product, addon, customer_name, recipient_name, message,
+                 delivery_address, delivery_date, same_day, is_delivery):
+        self.order_id = f"BBO-25-{DictOrder.counter:04d}"
+        DictOrder.counter += 1
+        self.product = product
+        self.addon = addon
+        self.customer_name = customer_name
+        self.recipient_name = recipient_name
+        self.message = message
+        self.delivery_address = delivery_address
+        self.delivery_date = delivery_date
+        self.same_day = same_day
+        self.is_delivery = is_delivery
+        self.status = "Open"
+        self.created_date = datetime.now()
+
+
+DictOrder.counter = 1
+
+
+class OrderTable:
+
+    def __init__(self, products, addons):
+        self.products = products
+        self.addons = addons
+        self._values = [""]
+        self._value_ids = {"": 0}
+        self.order_numbers = array("q")
+        self.product_codes = array("I")
+        self.addon_codes = array("I")
+        self.statuses = array("I")
+        self.delivery_dates = array("I")
+        self.flags = array("B")
+        self.created = array("d")
+        self.product_prices = array("d")
+        self.addon_prices = array("d")
+        self.totals = array("d")
+        self._text = bytearray()
+        self._text_offsets = array("Q", [0])
+
+    def _encode(self, value):
+        value_id = self._value_ids.get(value)
+        if value_id is None:
+            value_id = self._value_ids[value] = len(self._values)
+            self._values.append(value)
+        return value_id
+
+    def append(self, order):
+        self.order_numbers.append(order_number(order.order_id))
+        self.product_codes.append(self._encode(order.product.code))
+        self.addon_codes.append(self._encode(order.addon.code if order.addon else ""))
+        self.statuses.append(self._encode(order.status))
+        self.delivery_dates.append(self._encode(order.delivery_date))
+        self.flags.append(order.same_day | order.is_delivery << 1)
+        self.created.append(order.created_date.timestamp())
+        self.product_prices.append(order.product_price)
+        self.addon_prices.append(order.addon_price)
+        self.totals.append(order.total)
+        self._text += "\x1f".join((order.customer_name, order.recipient_name,
+                                   order.message, order.delivery_address)).encode("utf-8")
+        self._text_offsets.append(len(self._text))
+
+    def extend(self, orders):
+        for order in orders:
+            self.append(order)
+
+    def __len__(self):
+        return len(self.order_numbers)
+
+    def value(self, column, row):
+        return self._values[column[row]]
+
+    def order(self, row):
+        product_code = self.value(self.product_codes, row)
+        addon_code = self.value(self.addon_codes, row)
+        product = self.products.get(product_code)
+        if product is None:
+            product = Product(product_code, product_code, "", 0, "Unavailable")
+        text = self._text[self._text_offsets[row]:self._text_offsets[row + 1]].decode("utf-8")
+        customer_name, recipient_name, message, delivery_address = text.split("\x1f")
+        flags = self.flags[row]
+        return Order(product, self.addons.get(addon_code) if addon_code else None,
+                     customer_name, recipient_name, message, delivery_address,
+                     self.value(self.delivery_dates, row), bool(flags & 1), bool(flags & 2),
+                     order_id=format_order_id(self.order_numbers[row]),
+                     status=self.value(self.statuses, row),
+                     created_date=datetime.fromtimestamp(self.created[row]),
+                     product_price=self.product_prices[row], addon_price=self.addon_prices[row],
+                     total=self.totals[row])
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self.order(row)
+
+
+def order_fields(i, product, addon):
+    return (product, addon if i % 2 else None, f"Customer {i}", f"Recipient {i}",
+            f"Happy occasion {i % 50}", f"{i} Orchard Road", f"{i % 28 + 1:02d}/02/2026",
+            i % 3 == 0, i % 4 != 0)
+
+
+def generate_products(rows, rng):
+    categories = list(CATEGORY_PREFIXES)
+    products = []
+    for i in range(1, rows + 1):
+        category = categories[i % len(categories)]
+        products.append(Product(f"{CATEGORY_PREFIXES[category]}{i:03d}", f"Bouquet {i}", category,
+                                rng.randrange(30, 400), "Available" if i % 10 else "Unavailable"))
+    return products
+
+
+def generate_addons(rows, rng):
+    return [Addon(f"ADD{i:03d}", f"Add-on {i}", rng.randrange(5, 40), "Available" if i % 10 else "Unavailable")
+            for i in range(1, rows + 1)]
+
+
+def generate_orders(rows, products, addons, rng):
+    start = datetime(2025, 1, 1)
+    for i in range(1, rows + 1):
+        is_delivery = rng.random() < 0.7
+        created_date = start + timedelta(minutes=rng.randrange(525600))
+        delivery_date = (created_date + timedelta(days=rng.randrange(14))).strftime("%d/%m/%Y") if is_delivery else ""
+        yield Order(rng.choice(products), rng.choice(addons) if rng.random() < 0.4 else None,
+                    f"Customer {rng.randrange(max(rows // 5, 1))}", f"Recipient {i}", f"Message {i % 50}",
+                    f"{i} Orchard Road" if is_delivery else "", delivery_date,
+                    is_delivery and rng.random() < 0.2, is_delivery,
+                    order_id=f"BBO-25-{i:04d}", status=rng.choice(ORDER_STATUSES), created_date=created_date)
+
+
+def generate_dataset(directory, rows, seed=0):
+    rng = random.Random(seed)
+    products = generate_products(rows, rng)
+    addons = generate_addons(rows, rng)
+    CatalogFile(os.path.join(directory, "Products.txt"), None, product_record_fields).write(products, 1)
+    CatalogFile(os.path.join(directory, "Addons.txt"), None, addon_record_fields).write(addons, 1)
+
+    snapshot_filename = os.path.join(directory, "Orders.txt")
+    with open(snapshot_filename, "w", encoding="utf-8") as file:
+        for order in generate_orders(rows, products, addons, rng):
+            file.write(order_to_record(order) + "\n")
+    save_order_index(build_order_index(snapshot_filename), snapshot_filename,
+                     os.path.join(directory, "Orders.idx"))
+
+
+def quietly(function, *args, **kwargs):
+    stdin, sys.stdin = sys.stdin, io.StringIO("\n")
+    try:
+        with redirect_stdout(io.StringIO()):
+            return function(*args, **kwargs)
+    finally:
+        sys.stdin = stdin
+
+
+def measure(setup, run, repeat):
+    timings = []
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        stopped = time.perf_counter()
+        timings.append((getattr(state, "stopped", None) or stopped) - start)
+        wait_for_preload()
+        del state
+
+    state = setup()
+    tracemalloc.start()
+    run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    wait_for_preload()
+    return {"seconds": min(timings), "mean_seconds": sum(timings) / len(timings), "peak_bytes": peak}
+
+
+class MenuReached(Exception):
+    pass
+
+
+class Stopwatch:
+
+    def __init__(self):
+        self.stopped = None
+
+    def reach_menu(self, prompt=""):
+        self.stopped = time.perf_counter()
+        raise MenuReached(prompt)
+
+
+def wait_for_preload():
+    for thread in threading.enumerate():
+        if thread.name == "blooms-preload":
+            thread.join()
+
+
+def startup(stopwatch):
+    builtin_input, builtins.input = builtins.input, stopwatch.reach_menu
+    try:
+        quietly(run_app, TextStorage())
+    except MenuReached:
+        pass
+    finally:
+        builtins.input = builtin_input
+
+
+def load_catalogs():
+    return quietly(load_products), quietly(load_addons)
+
+
+def load_store():
+    products, addons = load_catalogs()
+    return quietly(load_orders, products, addons)
+
+
+def pending_orders(count=1000):
+    orders = load_store()
+    rng = random.Random(count)
+    products, addons = list(orders.products.values()), list(orders.addons.values())
+    return orders, [Order(*order_fields(i, rng.choice(products), rng.choice(addons))) for i in range(count)]
+
+
+def append_orders(state):
+    orders, new_orders = state
+    orders.journal.record_created_many(new_orders)
+
+
+def unarchived_store():
+    products, addons = load_catalogs()
+    return quietly(load_orders, products, addons, None)
+
+
+def load_session(state):
+    for collection in open_session(TextStorage()):
+        quietly(collection.get)
+
+
+def order_totals(orders):
+    return [order.total for order in orders]
+
+
+OPERATIONS = {
+    "startup": (Stopwatch, startup),
+    "load_session": (lambda: None, load_session),
+    "load_products": (lambda: None, lambda state: quietly(load_products)),
+    "save_products": (lambda: quietly(load_products), save_products),
+    "display_products": (lambda: quietly(load_products),
+                         lambda products: quietly(display_products, products, sort_by_price=True)),
+    "load_orders": (load_catalogs, lambda catalogs: quietly(load_orders, *catalogs)),
+    "view_orders_filter": (load_store, lambda orders: order_totals(orders.with_status("Open"))),
+    "view_orders_page": (load_store, lambda orders: order_totals(orders.page_with_status("Open", 0, PAGE_SIZE))),
+    "append_orders": (pending_orders, append_orders),
+    "compact_orders": (unarchived_store, lambda orders: orders.compact(force=True))
+}
+BUDGETS = {"startup": STARTUP_BUDGET}
+
+
+def run_benchmarks(sizes, repeat=3, operations=None, seed=0, data_dir=None):
+    results = []
+    original_directory = os.getcwd()
+    for rows in sizes:
+        directory = os.path.join(data_dir, str(rows)) if data_dir else tempfile.mkdtemp(prefix="blooms-bench-")
+        os.makedirs(directory, exist_ok=True)
+        try:
+            start = time.perf_counter()
+            generate_dataset(directory, rows, seed)
+            results.append({"rows": rows, "operation": "generate_dataset",
+                            "seconds": time.perf_counter() - start})
+            os.chdir(directory)
+            for name in operations or OPERATIONS:
+                setup, run = OPERATIONS[name]
+                results.append({"rows": rows, "operation": name, **measure(setup, run, repeat)})
+                if name in BUDGETS:
+                    results[-1]["budget_seconds"] = BUDGETS[name]
+                    results[-1]["within_budget"] = results[-1]["seconds"] <= BUDGETS[name]
+                print(f"{rows:>9} {name:<20} {results[-1]['seconds']:>10.4f}s"
+                      f"{'' if results[-1].get('within_budget', True) else '  OVER BUDGET'}", file=sys.stderr)
+        finally:
+            os.chdir(original_directory)
+            if not data_dir:
+                shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+
+def measure_bytes_per_order(build, count):
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    orders = build(count)
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del orders
+    return (after - before) / count
+
+
+def memory_benchmark(count=100000):
+    product = Product("R001", "Angel Eyes", "Romantic", 128)
+    addon = Addon("ADD001", "Chocolates", 8)
+
+    def build_dict_orders(n):
+        return [DictOrder(*order_fields(i, product, addon)) for i in range(n)]
+
+    def build_slotted_orders(n):
+        return [Order(*order_fields(i, product, addon)) for i in range(n)]
+
+    def build_order_table(n):
+        table = OrderTable({product.code: product}, {addon.code: addon})
+        for i in range(n):
+            table.append(Order(*order_fields(i, product, addon)))
+        return table
+
+    return {
+        "dict_order": measure_bytes_per_order(build_dict_orders, count),
+        "slotted_order": measure_bytes_per_order(build_slotted_orders, count),
+        "order_table": measure_bytes_per_order(build_order_table, count)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Beautiful Blooms benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="rows to generate for each data file")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per operation (best is reported)")
+    parser.add_argument("--operations", nargs="+", choices=list(OPERATIONS), help="operations to run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", help="keep the generated data files in this directory")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    parser.add_argument("--memory", type=int, metavar="COUNT",
+                        help="only report bytes per order for COUNT in-memory orders")
+    args = parser.parse_args()
+
+    if args.memory:
+        report = {"bytes_per_order": memory_benchmark(args.memory), "orders": args.memory}
+    else:
+        report = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "results": run_benchmarks(args.sizes, args.repeat, args.operations, args.seed,
+                                      os.path.abspath(args.data_dir) if args.data_dir else None)
+        }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+    if not all(result.get("within_budget", True) for result in report.get("results", ())):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
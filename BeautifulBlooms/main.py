@@ -1,17 +1,88 @@
-from datetime import datetime, timedelta
+from array import array
+from bisect import bisect_left, insort
+from datetime import date, datetime, timedelta
+from functools import lru_cache, wraps
+from heapq import heapify, heappop, heappush
+from itertools import chain, compress, islice
+from sys import intern
+from time import monotonic, perf_counter
+import argparse
+import cProfile
+import csv
+import errno
+import gzip
+import json
 import os
+import re
+import shutil
+import sqlite3
+import sys
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+class Instrumentation:
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.timings = {}
+        self.counters = {}
+
+    def timed(self, name):
+        def decorate(function):
+            if not self.enabled:
+                return function
+
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                start = perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record(name, perf_counter() - start)
+
+            return wrapper
+        return decorate
+
+    def record(self, name, seconds):
+        timing = self.timings.get(name)
+        if timing is None:
+            self.timings[name] = [1, seconds, seconds]
+        else:
+            timing[0] += 1
+            timing[1] += seconds
+            if seconds > timing[2]:
+                timing[2] = seconds
+
+    def count(self, name, amount=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self):
+        self.timings.clear()
+        self.counters.clear()
+
+
+stats = Instrumentation(os.environ.get("BLOOMS_STATS", "") not in ("", "0"))
 
 class Product:
+    __slots__ = ("code", "name", "category", "price", "status", "rating", "rating_count", "catalog")
 
     def __init__(self, code, name, category, price, status="Available"):
         self.code = code
         self.name = name
-        self.category = category
+        self.category = intern(category)
 
         self.price = float(price)
-        self.status = status
+        self.status = intern(status)
         self.rating = 0.0
         self.rating_count = 0
+        self.catalog = None
 
     def __str__(self):
         rating_str = f" ⭐{self.rating:.1f}/5 ({self.rating_count} reviews)" if self.rating_count > 0 else ""
@@ -19,75 +90,103 @@ class Product:
 
     def update_price(self, new_price):
         self.price = float(new_price)
+        self._changed()
 
     def update_status(self, new_status):
-        self.status = new_status
+        self.status = intern(new_status)
+        self._changed()
 
     def add_rating(self, rating):
         total_rating = self.rating * self.rating_count
         self.rating_count += 1
         self.rating = (total_rating + rating) / self.rating_count
+        self._changed(persisted=False)
+
+    def search_text(self):
+        return f"{self.code} {self.name} {self.category}"
+
+    def update_from(self, other):
+        self.name = other.name
+        self.category = other.category
+        self.price = other.price
+        self.status = other.status
+        self._changed()
+
+    def _changed(self, persisted=True):
+        if self.catalog is not None:
+            self.catalog.item_changed(self, persisted)
 
 
 class Addon:
+    __slots__ = ("code", "name", "price", "status", "catalog")
 
     def __init__(self, code, name, price, status="Available"):
         self.code = code
         self.name = name
         self.price = float(price)
-        self.status = status
+        self.status = intern(status)
+        self.catalog = None
 
     def __str__(self):
         return f"{self.code:<10} {self.name:<30} ${self.price:<8.2f} {self.status}"
 
     def update_price(self, new_price):
         self.price = float(new_price)
+        self._changed()
 
     def update_status(self, new_status):
-        self.status = new_status
+        self.status = intern(new_status)
+        self._changed()
+
+    def update_from(self, other):
+        self.name = other.name
+        self.price = other.price
+        self.status = other.status
+        self._changed()
+
+    def _changed(self, persisted=True):
+        if self.catalog is not None:
+            self.catalog.item_changed(self, persisted)
 
 
 class Order:
+    __slots__ = ("order_id", "product", "addon", "customer_name", "recipient_name", "message",
+                 "delivery_address", "delivery_date", "same_day", "is_delivery", "status",
+                 "created_date", "store", "product_price", "addon_price", "total")
     order_counter = 1
 
     def __init__(self, product, addon=None, customer_name="", recipient_name="",
                  message="", delivery_address="", delivery_date="", same_day=False,
-                 is_delivery=True):
-        self.order_id = f"BBO-25-{Order.order_counter:04d}"
-        Order.order_counter += 1
+                 is_delivery=True, order_id=None, status="Open", created_date=None,
+                 product_price=None, addon_price=None, total=None):
+        self.order_id = order_id or Order.next_order_id()
         self.product = product
         self.addon = addon
         self.customer_name = customer_name
         self.recipient_name = recipient_name
         self.message = message
         self.delivery_address = delivery_address
-        self.delivery_date = delivery_date
+        self.delivery_date = intern(delivery_date)
         self.same_day = same_day
         self.is_delivery = is_delivery
-        self.status = "Open"
-        self.created_date = datetime.now()
-
-    def calculate_total(self):
-        total = self.product.price
-        if self.addon:
-            total += self.addon.price
-
-        if self.is_delivery:
-            delivery_charge = 35
-            if self.delivery_date:
-                try:
-                    delivery_dt = datetime.strptime(self.delivery_date, "%d/%m/%Y")
-                    if delivery_dt.weekday() >= 5:
-                        delivery_charge += 10
-                except:
-                    pass
-
-            total += delivery_charge
-            if self.same_day:
-                total += 35
-
-        return total
-
+        self.status = intern(status)
+        self.created_date = created_date or datetime.now()
+        self.store = None
+        self.product_price = intern_price(product.price if product_price is None else product_price)
+        self.addon_price = intern_price((addon.price if addon else 0.0) if addon_price is None else addon_price)
+        self.total = intern_price(order_total(self.product_price, self.addon_price, is_delivery, same_day,
+                                              self.delivery_date) if total is None else total)
+
+    @classmethod
+    def next_order_id(cls):
+        order_id = format_order_id(cls.order_counter)
+        cls.order_counter += 1
+        return order_id
+
+    def search_text(self):
+        return order_search_text(self.customer_name, self.recipient_name, self.message, self.delivery_address)
+
+    @stats.timed("render.order_summary")
     def get_summary(self):
         summary = "=" * 60 + "\n"
         summary += f"{'ORDER SUMMARY':^60}\n"
@@ -95,32 +194,27 @@ class Order:
         summary += f"Order ID: {self.order_id}\n"
         summary += f"Status: {self.status}\n"
         summary += "-" * 60 + "\n"
-        summary += f"Item: {self.product.name} ({self.product.code}) ${self.product.price:.2f}\n"
+        summary += f"Item: {self.product.name} ({self.product.code}) ${self.product_price:.2f}\n"
 
         if self.addon:
-            summary += f"Add-on: {self.addon.name} ({self.addon.code}) ${self.addon.price:.2f}\n"
+            summary += f"Add-on: {self.addon.name} ({self.addon.code}) ${self.addon_price:.2f}\n"
 
         summary += "-" * 60 + "\n"
 
         if self.is_delivery:
             summary += f"Delivery Date: {self.delivery_date}\n"
-            delivery_charge = 35
-            if self.delivery_date:
-                try:
-                    delivery_dt = datetime.strptime(self.delivery_date, "%d/%m/%Y")
-                    if delivery_dt.weekday() >= 5:
-                        delivery_charge = 45
-                        summary += "Weekend Delivery: +$10\n"
-                except:
-                    pass
-
-            summary += f"Same Day Delivery: {'Yes' if self.same_day else 'No'} ${35 if self.same_day else 0:.2f}\n"
+            surcharge = delivery_surcharge(self.delivery_date)
+            delivery_charge = DELIVERY_CHARGE + surcharge
+            if surcharge:
+                summary += f"Weekend Delivery: +${surcharge}\n"
+
+            summary += f"Same Day Delivery: {'Yes' if self.same_day else 'No'} ${SAME_DAY_CHARGE if self.same_day else 0:.2f}\n"
             summary += f"Delivery Charges: ${delivery_charge:.2f}\n"
         else:
             summary += "Pickup: Store Pickup (No Delivery Charge)\n"
 
         summary += "-" * 60 + "\n"
-        summary += f"Total: ${self.calculate_total():.2f}\n"
+        summary += f"Total: ${self.total:.2f}\n"
         summary += "=" * 60 + "\n"
         summary += f"Customer Name: {self.customer_name}\n"
         summary += f"Recipient Name: {self.recipient_name}\n"
@@ -134,57 +228,827 @@ class Order:
         return summary
 
     def update_status(self, new_status):
-        self.status = new_status
+        old_status = self.status
+        self.status = intern(new_status)
+        if self.store is not None:
+            return self.store.status_changed(self, old_status)
+        return None
+
+
+class CodeAllocator:
+
+    def __init__(self, codes=()):
+        self._used = {}
+        self._next_free = {}
+        for code in codes:
+            self.claim(code)
+
+    @staticmethod
+    def split_code(code):
+        match = re.fullmatch(r"(.*?)(\d+)", code)
+        if match is None:
+            return None, None
+        prefix, number = match.group(1), int(match.group(2))
+        if code != f"{prefix}{number:03d}":
+            return None, None
+        return prefix, number
+
+    def claim(self, code):
+        prefix, number = self.split_code(code)
+        if prefix is not None:
+            self._used.setdefault(prefix, set()).add(number)
+
+    def release(self, code):
+        prefix, number = self.split_code(code)
+        if prefix is not None and number in self._used.get(prefix, ()):
+            self._used[prefix].discard(number)
+            self._next_free[prefix] = min(self._next_free.get(prefix, 1), number)
+
+    def allocate(self, prefix):
+        used = self._used.setdefault(prefix, set())
+        number = self._next_free.get(prefix, 1)
+        while number in used:
+            number += 1
+        used.add(number)
+        self._next_free[prefix] = number + 1
+        return f"{prefix}{number:03d}"
+
+
+class FileLock:
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = None
+        self._depth = 0
+        self._thread_lock = threading.RLock()
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            self._file = open(self.filename, "a+b")
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            else:
+                self._file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError as e:
+                        if e.errno != errno.EDEADLOCK:
+                            raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._depth -= 1
+        if self._depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+
+
+def file_signature(filename):
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+class WriteBehind:
+
+    def __init__(self, delay=0.5):
+        self.delay = delay
+        self._pending = {}
+        self._deadline = None
+        self._busy = False
+        self._closed = False
+        self._failed = {}
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="blooms-write-behind", daemon=True)
+        self._thread.start()
+
+    def schedule(self, function):
+        with self._condition:
+            if not self._closed:
+                self._pending[function] = None
+                if self._deadline is None:
+                    self._deadline = monotonic() + self.delay
+                self._condition.notify_all()
+                return True
+        return function() is not False
+
+    def _next_batch(self):
+        with self._condition:
+            while True:
+                if self._pending:
+                    remaining = self._deadline - monotonic()
+                    if remaining <= 0 or self._closed:
+                        batch = list(self._pending)
+                        self._pending = {}
+                        self._deadline = None
+                        self._busy = True
+                        return batch
+                    self._condition.wait(remaining)
+                elif self._closed:
+                    return None
+                else:
+                    self._condition.wait()
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            for function in batch:
+                try:
+                    saved = function() is not False
+                except Exception as e:
+                    print(f"⚠ Background save failed: {e}")
+                    saved = False
+                with self._condition:
+                    if saved:
+                        self._failed.pop(function, None)
+                    else:
+                        self._failed[function] = None
+            stats.count("persistence.group_commits")
+            stats.count("persistence.writes", len(batch))
+            with self._condition:
+                self._busy = False
+                self._condition.notify_all()
+
+    def flush(self):
+        with self._condition:
+            if self._pending:
+                self._deadline = monotonic()
+                self._condition.notify_all()
+            while self._pending or self._busy:
+                self._condition.wait()
+
+    def close(self):
+        self.flush()
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        failed, self._failed = list(self._failed), {}
+        for function in failed:
+            try:
+                if function() is not False:
+                    continue
+            except Exception as e:
+                print(f"⚠ Save failed: {e}")
+            self._failed[function] = None
+        return not self._failed
+
 
+def sync_file(filename):
+    try:
+        with open(filename, "ab") as file:
+            os.fsync(file.fileno())
+    except FileNotFoundError:
+        pass
+
+
+class RecordCodec:
+
+    def __init__(self, separator):
+        self.separator = separator
+        self._escapes = str.maketrans({"\\": "\\\\", separator: "\\" + separator, "\n": "\\n", "\r": "\\r"})
+        self._unescapes = {"n": "\n", "r": "\r", "\\": "\\", separator: separator}
+        self._tokens = re.compile(rf"\\(.)|({re.escape(separator)})|([^\\{re.escape(separator)}]+)", re.S).findall
+
+    def join(self, fields):
+        line = self.separator.join(fields)
+        if (line.count(self.separator) == len(fields) - 1 and "\\" not in line
+                and "\n" not in line and "\r" not in line):
+            return line
+        return self.separator.join(field.translate(self._escapes) for field in fields)
+
+    def join_lines(self, rows):
+        rows = list(rows)
+        if not rows:
+            return ""
+        text = "\n".join(map(self.separator.join, rows)) + "\n"
+        if (text.count(self.separator) == sum(map(len, rows)) - len(rows) and text.count("\n") == len(rows)
+                and "\\" not in text and "\r" not in text):
+            return text
+        return "".join(self.join(row) + "\n" for row in rows)
+
+    def split(self, line, maxsplit=-1):
+        if "\\" not in line:
+            return line.split(self.separator, maxsplit)
+        fields = [""]
+        for escaped, separator, text in self._tokens(line):
+            if separator:
+                fields.append("")
+            elif escaped:
+                fields[-1] += self._unescapes.get(escaped, "\\" + escaped)
+            else:
+                fields[-1] += text
+        return fields
+
+    def records(self, lines, escaped=True):
+        separator = self.separator
+        split = self.split
+        for line in lines:
+            line = line.strip()
+            if line and line[0] != "#":
+                yield line.split(separator) if not escaped or "\\" not in line else split(line)
+
+
+CATALOG_CODEC = RecordCodec(",")
+ORDER_CODEC = RecordCodec("|")
+
+
+def read_generation(filename):
+    try:
+        with open(filename, "r", encoding="utf-8") as file:
+            line = file.readline()
+    except FileNotFoundError:
+        return 0
+    if line.startswith("#generation="):
+        return int(line.strip().split("=", 1)[1])
+    return 0
+
+
+class CatalogFile:
+
+    def __init__(self, filename, parse_record, record_fields):
+        self.filename = filename
+        self.parse_record = parse_record
+        self.record_fields = record_fields
+        self.lock = FileLock(filename + ".lock")
+        self.signature = None
+
+    @stats.timed("load.catalog_parse")
+    def read(self):
+        with open(self.filename, "r", encoding="utf-8") as file:
+            first_line = file.readline()
+            escaped = first_line.startswith("#generation=")
+            generation = int(first_line.split("=", 1)[1]) if escaped else 0
+            records = CATALOG_CODEC.records(chain((first_line,), file), escaped)
+            items = {item.code: item for item in map(self.parse_record, records) if item is not None}
+        return generation, items
+
+    @stats.timed("save.catalog_write")
+    def write(self, items, generation, changed_codes=None):
+        temp_filename = self.filename + ".tmp"
+        with open(temp_filename, "w", encoding="utf-8") as file:
+            file.write(f"#generation={generation}\n")
+            file.write(CATALOG_CODEC.join_lines(map(self.record_fields, items)))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_filename, self.filename)
+
+    def changed(self):
+        return file_signature(self.filename) != self.signature
+
+    def mark_seen(self):
+        self.signature = file_signature(self.filename)
+
+    def invalidate(self):
+        self.signature = None
+
+    def generation(self):
+        return read_generation(self.filename)
+
+
+class Catalog(dict):
+
+    def __init__(self, items=None, file=None, generation=0):
+        super().__init__()
+        self.codes = CodeAllocator()
+        self.file = file
+        self.generation = generation
+        self.writer = None
+        self._dirty = set()
+        self._created = set()
+        self._pending = None
+        self._pending_lock = threading.Lock()
+        if items:
+            self.add_many(items.values())
+        self._dirty.clear()
+        self._created.clear()
+        if file is not None:
+            file.mark_seen()
+
+    def __setitem__(self, code, item):
+        if code not in self:
+            self._created.add(code)
+        super().__setitem__(code, item)
+        item.catalog = self
+        self.codes.claim(code)
+        self._dirty.add(code)
+
+    def __delitem__(self, code):
+        super().__delitem__(code)
+        self.codes.release(code)
+        self._dirty.add(code)
+        self._created.discard(code)
+
+    def add_many(self, items):
+        for item in items:
+            self[item.code] = item
+
+    def item_changed(self, item, persisted=True):
+        if persisted:
+            self._dirty.add(item.code)
+
+    def _merge(self, items):
+        conflicts = [self[code] for code in self._created if code in items]
+        for item in conflicts:
+            del self[item.code]
+        conflict_codes = {item.code for item in conflicts}
+        dirty = self._dirty - conflict_codes
+        self._dirty = set()
+        with self._pending_lock:
+            if self._pending:
+                self._pending[1].difference_update(conflict_codes)
+            unsaved = dirty | self._pending[1] if self._pending else dirty
+        for code, item in items.items():
+            if code in unsaved:
+                continue
+            if code in self:
+                self[code].update_from(item)
+            else:
+                self[code] = item
+        for code in list(self):
+            if code not in items and code not in unsaved:
+                del self[code]
+        self._created.difference_update(items)
+        self._dirty = dirty
+        for item in conflicts:
+            self._reassign(item)
+        return bool(conflicts)
+
+    def _reassign(self, item):
+        code = item.code
+        prefix = CodeAllocator.split_code(code)[0]
+        if prefix is None:
+            print(f"⚠ Code '{code}' was added by another session; '{item.name}' was not saved")
+            return
+        item.code = self.codes.allocate(prefix)
+        self[item.code] = item
+        print(f"⚠ Code '{code}' was taken by another session; '{item.name}' is now {item.code}")
+
+    def refresh(self):
+        if self.file is None or not self.file.changed():
+            return False
+        with self.file.lock:
+            generation, items = self.file.read()
+            reassigned = self._merge(items)
+            self.generation = generation
+            self.file.mark_seen()
+        if reassigned and self.writer is not None:
+            self.save_later()
+        return True
 
-def load_products():
+    def save(self):
+        with self.file.lock:
+            if self.file.changed() or self.file.generation() != self.generation:
+                self.file.invalidate()
+                self.refresh()
+            saved, self._dirty = self._dirty, set()
+            try:
+                self.file.write(list(self.values()), self.generation + 1, saved)
+            except Exception:
+                self._dirty |= saved
+                raise
+            self.generation += 1
+            self.file.mark_seen()
+            self._created.difference_update(saved)
+        return True
+
+    def save_later(self):
+        if self.writer is None:
+            return self.save()
+        with self._pending_lock:
+            saved = self._dirty | self._pending[1] if self._pending else self._dirty
+            self._dirty = set()
+            self._pending = (list(self.values()), saved, self.generation)
+        return self.writer.schedule(self._save_pending)
+
+    def _save_pending(self):
+        with self.file.lock:
+            with self._pending_lock:
+                pending, self._pending = self._pending, None
+            if pending is None:
+                return True
+            items, saved, generation = pending
+            conflicts = set()
+            try:
+                if self.file.changed() or self.file.generation() != generation:
+                    generation, current = self.file.read()
+                    conflicts = {code for code in saved if code in current and code in self._created}
+                    saved = saved - conflicts
+                    latest = {item.code: item for item in items if item.code in saved}
+                    for code in saved:
+                        if code in latest:
+                            current[code] = latest[code]
+                        else:
+                            current.pop(code, None)
+                    self.file.write(list(current.values()), generation + 1, saved)
+                else:
+                    self.file.write(items, generation + 1, saved)
+                    self.generation = generation + 1
+                    self.file.mark_seen()
+                self._created.difference_update(saved)
+            except Exception:
+                self._requeue(items, saved | conflicts, generation)
+                raise
+            if conflicts:
+                self._requeue(items, conflicts, generation)
+                print(f"⚠ Codes taken by another session, not saved yet: {', '.join(sorted(conflicts))}")
+                return False
+        return True
+
+    def _requeue(self, items, codes, generation):
+        with self._pending_lock:
+            if self._pending is None:
+                self._pending = (items, codes, generation)
+            else:
+                self._pending[1].update(codes)
+
+
+class ProductCatalog(Catalog):
+
+    SORT_KEYS = {
+        None: lambda product, sequence: (sequence,),
+        "price": lambda product, sequence: (product.price, sequence),
+        "rating": lambda product, sequence: (-product.rating, sequence)
+    }
+
+    def __init__(self, products=None, ratings=None, file=None, generation=0):
+        self._sequence = 0
+        self._sequence_of = {}
+        self._code_of = {}
+        self._indexed = {}
+        self._views = {}
+        self._search = SearchIndex()
+        self._search_text = {}
+        self.ratings = ratings or RatingStore()
+        if products:
+            for product in products.values():
+                self.ratings.apply(product)
+        super().__init__(products, file, generation)
+
+    def _view_entries(self, product):
+        sequence = self._sequence_of[product.code]
+        return [(sort_by, key(product, sequence) + (product.code,)) for sort_by, key in self.SORT_KEYS.items()]
+
+    def _register(self, product):
+        if product.code in self:
+            self._remove(product.code)
+        super().__setitem__(product.code, product)
+        if product.code not in self._sequence_of:
+            self._sequence += 1
+            self._sequence_of[product.code] = self._sequence
+            self._code_of[self._sequence] = product.code
+
+    def _stale_text(self, product):
+        text = product.search_text()
+        old_text = self._search_text.get(product.code)
+        if text == old_text:
+            return None
+        if old_text is not None:
+            self._search.remove(self._sequence_of[product.code], old_text)
+        self._search_text[product.code] = text
+        return self._sequence_of[product.code], text
+
+    def _reindex_text(self, product):
+        document = self._stale_text(product)
+        if document is not None:
+            self._search.add(*document)
+
+    def _insert(self, product):
+        if product.status != "Available":
+            return
+        entries = self._view_entries(product)
+        self._indexed[product.code] = (product.category, entries)
+        for category in (None, product.category):
+            for sort_by, entry in entries:
+                insort(self._views.setdefault((category, sort_by), []), entry)
+
+    def _remove(self, code):
+        category, entries = self._indexed.pop(code, (None, ()))
+        for view_category in (None, category):
+            for sort_by, entry in entries:
+                view = self._views[(view_category, sort_by)]
+                del view[bisect_left(view, entry)]
+
+    def __setitem__(self, code, product):
+        self._register(product)
+        self._reindex_text(product)
+        self._insert(product)
+
+    def __delitem__(self, code):
+        self._remove(code)
+        if code in self._search_text:
+            self._search.remove(self._sequence_of[code], self._search_text.pop(code))
+        self._code_of.pop(self._sequence_of.pop(code, None), None)
+        super().__delitem__(code)
+
+    def add_many(self, products):
+        products = list(products)
+        for product in products:
+            self._register(product)
+        documents = [document for document in map(self._stale_text, products) if document is not None]
+        self._search.add_many(documents)
+        self._indexed = {}
+        self._views = {}
+        for product in self.values():
+            if product.status == "Available":
+                entries = self._view_entries(product)
+                self._indexed[product.code] = (product.category, entries)
+                for category in (None, product.category):
+                    for sort_by, entry in entries:
+                        self._views.setdefault((category, sort_by), []).append(entry)
+        for view in self._views.values():
+            view.sort()
+
+    def item_changed(self, product, persisted=True):
+        super().item_changed(product, persisted)
+        self._remove(product.code)
+        self._insert(product)
+        self._reindex_text(product)
+
+    def search(self, query):
+        return [self[self._code_of[sequence]] for sequence in sorted(self._search.search(query))]
+
+    def refresh(self):
+        changed = super().refresh()
+        return self.ratings.refresh(self) or changed
+
+    def available(self, category=None, sort_by=None, start=0, stop=None):
+        return [self[entry[-1]] for entry in self._views.get((category, sort_by), ())[start:stop]]
+
+    def count_available(self, category=None, sort_by=None):
+        return len(self._views.get((category, sort_by), ()))
+
+
+DELIVERY_CHARGE = 35
+WEEKEND_SURCHARGE = 10
+SAME_DAY_CHARGE = 35
+
+
+@lru_cache(maxsize=4096)
+def delivery_date_info(delivery_date):
+    try:
+        weekday = datetime.strptime(delivery_date, "%d/%m/%Y").weekday()
+    except (TypeError, ValueError):
+        return None, 0
+    return weekday, WEEKEND_SURCHARGE if weekday >= 5 else 0
+
+
+def delivery_surcharge(delivery_date):
+    if not delivery_date:
+        return 0
+    return delivery_date_info(delivery_date)[1]
+
+
+@lru_cache(maxsize=4096)
+def delivery_day(delivery_date):
+    try:
+        return datetime.strptime(delivery_date, "%d/%m/%Y").toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def canonical_delivery_date(delivery_date):
+    day = delivery_day(delivery_date)
+    return None if day is None else date.fromordinal(day).strftime("%d/%m/%Y")
+
+
+_prices = {}
+
+
+def intern_price(price):
+    price = float(price)
+    return _prices.setdefault(price, price)
+
+
+def order_total(product_price, addon_price, is_delivery, same_day, delivery_date):
+    total = product_price + addon_price
+    if is_delivery:
+        total += DELIVERY_CHARGE + delivery_surcharge(delivery_date)
+        if same_day:
+            total += SAME_DAY_CHARGE
+    return total
+
+
+class RatingStore:
+
+    def __init__(self, filename="Ratings.txt", log_filename="RatingsLog.txt", compact_bytes=64 * 1024):
+        self.filename = filename
+        self.log_filename = log_filename
+        self.compact_bytes = compact_bytes
+        self.lock = FileLock(filename + ".lock")
+        self.writer = None
+        self.totals = {}
+        self.generation = 0
+        self.log_size = 0
+        self.signature = None
+        self._unapplied = set()
+
+    def load(self):
+        self.totals = {}
+        covered = None
+        try:
+            with open(self.filename, "r", encoding="utf-8") as file:
+                for line in file:
+                    if line.startswith("#"):
+                        header = dict(part.split("=", 1) for part in line.lstrip("#").split())
+                        covered = (int(header["generation"]), int(header["position"]))
+                        continue
+                    parts = line.strip().split(",")
+                    if len(parts) == 3:
+                        self.totals[parts[0]] = [float(parts[1]), int(parts[2])]
+        except FileNotFoundError:
+            pass
+        self.signature = file_signature(self.filename)
+        self.generation = read_generation(self.log_filename)
+        self.log_size = covered[1] if covered is not None and covered[0] == self.generation else 0
+        self._read_log()
+        return self
+
+    def _read_log(self):
+        codes = set()
+        try:
+            with open(self.log_filename, "rb") as file:
+                file.seek(self.log_size)
+                for line in file:
+                    if not line.endswith(b"\n"):
+                        break
+                    self.log_size += len(line)
+                    parts = line.decode("utf-8").strip().split(",")
+                    if len(parts) == 2 and not parts[0].startswith("#"):
+                        self._add(parts[0], float(parts[1]))
+                        codes.add(parts[0])
+        except FileNotFoundError:
+            pass
+        return codes
+
+    def _add(self, code, rating):
+        totals = self.totals.setdefault(code, [0.0, 0])
+        totals[0] += rating
+        totals[1] += 1
+
+    def apply(self, product):
+        if product.code in self.totals:
+            rating_sum, rating_count = self.totals[product.code]
+            product.rating_count = rating_count
+            product.rating = rating_sum / rating_count if rating_count else 0.0
+
+    def changed(self):
+        return (self._unapplied is None or bool(self._unapplied) or file_signature(self.filename) != self.signature or
+                (os.path.getsize(self.log_filename) if os.path.exists(self.log_filename) else 0) != self.log_size)
+
+    def _catch_up(self):
+        if file_signature(self.filename) != self.signature or read_generation(self.log_filename) != self.generation:
+            self.load()
+            self._unapplied = None
+        else:
+            codes = self._read_log()
+            if self._unapplied is not None:
+                self._unapplied |= codes
+
+    def refresh(self, products):
+        if not self.changed():
+            return False
+        with self.lock:
+            self._catch_up()
+            codes, self._unapplied = self._unapplied, set()
+            for code in list(products) if codes is None else codes:
+                if code in products:
+                    self.apply(products[code])
+                    products.item_changed(products[code], persisted=False)
+        return True
+
+    @stats.timed("save.rating")
+    def record(self, product, rating):
+        try:
+            with self.lock:
+                if product.catalog is not None:
+                    self.refresh(product.catalog)
+                data = f"{product.code},{rating}\n".encode("utf-8")
+                with open(self.log_filename, "ab") as file:
+                    file.write(data)
+                self.log_size += len(data)
+                self._add(product.code, rating)
+                self.apply(product)
+                product._changed(persisted=False)
+                if self.writer is not None:
+                    self.writer.schedule(self.sync)
+                if self.should_compact():
+                    if self.writer is not None:
+                        self.writer.schedule(self.compact)
+                    else:
+                        self.compact()
+        except Exception as e:
+            print(f"⚠ Error saving rating: {e}")
+            return False
+        return True
+
+    def sync(self):
+        sync_file(self.log_filename)
+
+    def should_compact(self):
+        return self.log_size >= max(self.compact_bytes, len(self.totals) * 32)
+
+    def compact(self):
+        try:
+            with self.lock:
+                self._catch_up()
+                if not self.should_compact():
+                    return True
+                temp_filename = self.filename + ".tmp"
+                with open(temp_filename, "w", encoding="utf-8") as file:
+                    file.write(f"#generation={self.generation} position={self.log_size}\n")
+                    for code, (rating_sum, rating_count) in self.totals.items():
+                        file.write(f"{code},{rating_sum},{rating_count}\n")
+                    file.flush()
+                    os.fsync(file.fileno())
+                os.replace(temp_filename, self.filename)
+                self.generation += 1
+                header = f"#generation={self.generation}\n"
+                with open(self.log_filename, "w", encoding="utf-8") as file:
+                    file.write(header)
+                self.log_size = len(header.encode("utf-8"))
+                self.signature = file_signature(self.filename)
+            return True
+        except Exception as e:
+            print(f"⚠ Error compacting ratings: {e}")
+            return False
+
+
+def parse_product_record(parts):
+    if len(parts) >= 5:
+        code, name, category, price, status = parts[:5]
+        return Product(code, name, category, price, status)
+    elif len(parts) == 4:
+        code, name, category, price = parts
+        return Product(code, name, category, price)
+    return None
+
+
+def product_record_fields(product):
+    return product.code, product.name, product.category, str(product.price), product.status
+
+
+def parse_addon_record(parts):
+    if len(parts) >= 4:
+        code, name, price, status = parts[:4]
+        return Addon(code, name, price, status)
+    elif len(parts) == 3:
+        code, name, price = parts
+        return Addon(code, name, price)
+    return None
+
+
+def addon_record_fields(addon):
+    return addon.code, addon.name, str(addon.price), addon.status
+
+
+@stats.timed("load.products")
+def load_products(filename="Products.txt"):
     products = {}
+    generation = 0
+    catalog_file = CatalogFile(filename, parse_product_record, product_record_fields)
     try:
-        with open("Products.txt", "r", encoding="utf-8") as file:
-            for line in file:
-                line = line.strip()
-                if line:
-                    parts = line.split(",")
-                    if len(parts) >= 5:
-                        code, name, category, price, status = parts
-                        products[code] = Product(code, name, category, price, status)
-                    elif len(parts) == 4:
-                        code, name, category, price = parts
-                        products[code] = Product(code, name, category, price)
+        generation, products = catalog_file.read()
         print(f"✓ Loaded {len(products)} products successfully")
     except FileNotFoundError:
         print("⚠ Products.txt not found. Starting with empty inventory.")
     except Exception as e:
         print(f"⚠ Error loading products: {e}")
 
-    return products
+    return ProductCatalog(products, RatingStore().load(), catalog_file, generation)
 
 
+@stats.timed("save.products")
 def save_products(products):
     try:
-        with open("Products.txt", "w", encoding="utf-8") as file:
-            for product in products.values():
-                file.write(f"{product.code},{product.name},{product.category},{product.price},{product.status}\n")
-        return True
+        return products.save_later()
     except Exception as e:
         print(f"⚠ Error saving products: {e}")
         return False
 
 
-def load_addons():
+@stats.timed("load.addons")
+def load_addons(filename="Addons.txt"):
     addons = {}
+    generation = 0
+    create_defaults = False
+    catalog_file = CatalogFile(filename, parse_addon_record, addon_record_fields)
     try:
-        with open("Addons.txt", "r", encoding="utf-8") as file:
-            for line in file:
-                line = line.strip()
-                if line:
-                    parts = line.split(",")
-                    if len(parts) >= 4:
-                        code, name, price, status = parts
-                        addons[code] = Addon(code, name, price, status)
-                    elif len(parts) == 3:
-                        code, name, price = parts
-                        addons[code] = Addon(code, name, price)
+        generation, addons = catalog_file.read()
         print(f"✓ Loaded {len(addons)} add-ons successfully")
     except FileNotFoundError:
         print("⚠ Addons.txt not found. Creating default add-ons.")
@@ -193,38 +1057,1830 @@ def load_addons():
             "ADD002": Addon("ADD002", "Customized Handwritten card", 12),
             "ADD003": Addon("ADD003", "Soft Toy", 16)
         }
-        save_addons(addons)
+        create_defaults = True
     except Exception as e:
         print(f"⚠ Error loading add-ons: {e}")
 
-    return addons
+    catalog = Catalog(addons, catalog_file, generation)
+    if create_defaults:
+        save_addons(catalog)
+    return catalog
 
 
+@stats.timed("save.addons")
 def save_addons(addons):
     try:
-        with open("Addons.txt", "w", encoding="utf-8") as file:
-            for addon in addons.values():
-                file.write(f"{addon.code},{addon.name},{addon.price},{addon.status}\n")
-        return True
+        return addons.save_later()
     except Exception as e:
         print(f"⚠ Error saving add-ons: {e}")
         return False
 
 
-def save_orders(orders):
+def order_record_fields(order):
+    return (order.order_id, order.product.code, order.addon.code if order.addon else "NONE",
+            order.customer_name, order.recipient_name, order.message,
+            order.delivery_address, order.delivery_date,
+            str(order.same_day), str(order.is_delivery), order.status,
+            order.created_date.isoformat(timespec="seconds"),
+            repr(order.product_price), repr(order.addon_price), repr(order.total))
+
+
+ORDER_FIELD_COUNT = 15
+
+
+def order_to_record(order):
+    return ORDER_CODEC.join(order_record_fields(order))
+
+
+def split_order_record(line, maxsplit=-1):
+    if "\\" in line and line.count("|") >= ORDER_FIELD_COUNT - 1:
+        return ORDER_CODEC.split(line, maxsplit)
+    return line.split("|", maxsplit)
+
+
+@stats.timed("parse.order_record")
+def order_from_record(fields, products, addons):
+    (order_id, product_code, addon_code, customer_name, recipient_name, message,
+     delivery_address, delivery_date, same_day, is_delivery, status) = fields[:11]
+    created_date = datetime.fromisoformat(fields[11]) if len(fields) > 11 and fields[11] else None
+    prices = fields[12:15] if len(fields) >= ORDER_FIELD_COUNT and fields[14] not in ("", None) else (None,) * 3
+
+    product = products.get(product_code)
+    if product is None:
+        product = Product(product_code, product_code, "", 0, "Unavailable")
+    addon = addons.get(addon_code) if addon_code != "NONE" else None
+
+    return Order(product, addon, customer_name, recipient_name, message, delivery_address,
+                 delivery_date, same_day == "True", is_delivery == "True",
+                 order_id=order_id, status=status, created_date=created_date,
+                 product_price=prices[0], addon_price=prices[1], total=prices[2])
+
+
+def format_order_id(number):
+    return f"BBO-25-{number:04d}"
+
+
+def order_number(order_id):
     try:
-        with open("Orders.txt", "w", encoding="utf-8") as file:
-            for order in orders.values():
-                addon_code = order.addon.code if order.addon else "NONE"
-                file.write(f"{order.order_id}|{order.product.code}|{addon_code}|")
-                file.write(f"{order.customer_name}|{order.recipient_name}|{order.message}|")
-                file.write(f"{order.delivery_address}|{order.delivery_date}|")
-                file.write(f"{order.same_day}|{order.is_delivery}|{order.status}\n")
+        return int(order_id.rsplit("-", 1)[1])
+    except (IndexError, ValueError):
+        return 0
+
+
+def read_order_record(filename, offset):
+    with open(filename, "rb") as file:
+        file.seek(offset)
+        return split_order_record(file.readline().decode("utf-8").rstrip("\n"))
+
+
+def index_entry(offset, fields):
+    return offset, fields[10], fields[7], fields[3]
+
+
+def build_order_index(snapshot_filename="Orders.txt"):
+    entries = {}
+    position = 0
+    with open(snapshot_filename, "rb") as file:
+        for line in file:
+            if line.strip():
+                fields = split_order_record(line.decode("utf-8").rstrip("\n"))
+                entries[fields[0]] = index_entry(position, fields)
+            position += len(line)
+    return entries
+
+
+def save_order_index(entries, snapshot_filename="Orders.txt", index_filename="Orders.idx", next_number=0):
+    try:
+        stat = os.stat(snapshot_filename)
+        next_number = max(max(map(order_number, entries), default=0) + 1, next_number)
+        columns = list(zip(*entries.values())) or [(), (), (), ()]
+        temp_filename = index_filename + ".tmp"
+        with open(temp_filename, "w", encoding="utf-8") as file:
+            file.write(f"{stat.st_size} {stat.st_mtime_ns} {next_number} {len(entries)}\n")
+            file.write("\t".join(entries) + "\n")
+            file.write("\t".join(map(str, columns[0])) + "\n")
+            for column in columns[1:]:
+                file.write("\t".join(value.replace("\t", " ").replace("\n", " ") for value in column) + "\n")
+        os.replace(temp_filename, index_filename)
         return True
     except Exception as e:
-        print(f"⚠ Error saving orders: {e}")
+        print(f"⚠ Error saving order index: {e}")
         return False
 
+
+def read_order_index(snapshot_filename="Orders.txt", index_filename="Orders.idx", column_count=5):
+    stat = os.stat(snapshot_filename)
+    try:
+        with open(index_filename, "r", encoding="utf-8") as file:
+            size, mtime_ns, next_number, count = map(int, file.readline().split())
+            if size != stat.st_size or mtime_ns != stat.st_mtime_ns:
+                return None, 0
+            columns = [file.readline().rstrip("\n").split("\t") if count else [] for _ in range(column_count)]
+            if all(len(column) == count for column in columns):
+                return columns, next_number
+    except (FileNotFoundError, ValueError):
+        pass
+    return None, 0
+
+
+def load_order_index(snapshot_filename="Orders.txt", index_filename="Orders.idx"):
+    columns, next_number = read_order_index(snapshot_filename, index_filename, 2)
+    if columns is not None:
+        ids, offsets = columns
+        return dict(zip(ids, map(int, offsets))), next_number
+
+    entries = build_order_index(snapshot_filename)
+    save_order_index(entries, snapshot_filename, index_filename)
+    next_number = max(map(order_number, entries), default=0) + 1
+    return {order_id: entry[0] for order_id, entry in entries.items()}, next_number
+
+
+def load_order_index_entries(snapshot_filename="Orders.txt", index_filename="Orders.idx"):
+    columns, _ = read_order_index(snapshot_filename, index_filename)
+    if columns is not None:
+        ids, offsets, statuses, dates, customers = columns
+        return ids, statuses, dates, customers
+
+    entries = build_order_index(snapshot_filename)
+    _, statuses, dates, customers = zip(*entries.values()) if entries else ((), (), (), ())
+    return list(entries), list(statuses), list(dates), list(customers)
+
+
+class OrderJournal:
+
+    def __init__(self, filename="OrdersJournal.txt", snapshot_filename="Orders.txt",
+                 index_filename="Orders.idx", compact_bytes=256 * 1024):
+        self.filename = filename
+        self.snapshot_filename = snapshot_filename
+        self.index_filename = index_filename
+        self.compact_bytes = compact_bytes
+        self.lock = FileLock(snapshot_filename + ".lock")
+        self.generation = 0
+        self.journal_size = 0
+        self.snapshot_signature = None
+
+    @stats.timed("save.order_journal")
+    def _append(self, line):
+        try:
+            data = (line + "\n").encode("utf-8")
+            with open(self.filename, "ab") as file:
+                file.write(data)
+            self.journal_size += len(data)
+            stats.count("journal.bytes_written", len(data))
+            return True
+        except Exception as e:
+            print(f"⚠ Error writing order journal: {e}")
+            return False
+
+    def record_created_many(self, orders, deltas=None):
+        if not orders:
+            return True
+        return self._append("\n".join(chain(("C|" + order_to_record(order) for order in orders),
+                                            counter_lines(deltas))))
+
+    def sync(self):
+        with self.lock:
+            sync_file(self.filename)
+
+    def record_status(self, order, deltas=None):
+        return self.record_status_many([order], deltas)
+
+    def record_status_many(self, orders, deltas=None):
+        if not orders:
+            return True
+        return self._append("\n".join(chain((f"S|{order.order_id}|{order.status}" for order in orders),
+                                            counter_lines(deltas))))
+
+    @stats.timed("parse.order_journal")
+    def scan(self, position=0, counters=None):
+        created = {}
+        statuses = {}
+        if position == 0:
+            self.generation = read_generation(self.filename)
+            self.snapshot_signature = file_signature(self.snapshot_filename)
+        try:
+            with open(self.filename, "rb") as file:
+                file.seek(position)
+                for line in file:
+                    if not line.endswith(b"\n"):
+                        break
+                    if line.startswith(b"C|"):
+                        fields = ORDER_CODEC.split(line[2:].decode("utf-8").rstrip("\n"))
+                        created[fields[0]] = index_entry(position + 2, fields)
+                    elif line.startswith(b"S|"):
+                        _, order_id, status = line.decode("utf-8").rstrip("\n").split("|", 2)
+                        statuses[order_id] = status
+                    elif line.startswith(b"D|") and counters is not None and counters.follows(self, position):
+                        _, key, delta = ORDER_CODEC.split(line.decode("utf-8").rstrip("\n"))
+                        counters.add(key, float(delta))
+                    position += len(line)
+        except FileNotFoundError:
+            pass
+        self.journal_size = position
+        return created, statuses
+
+    def changed(self):
+        journal_size = os.path.getsize(self.filename) if os.path.exists(self.filename) else 0
+        return journal_size != self.journal_size or file_signature(self.snapshot_filename) != self.snapshot_signature
+
+    def replaced(self):
+        return (read_generation(self.filename) != self.generation or
+                file_signature(self.snapshot_filename) != self.snapshot_signature)
+
+    def should_compact(self):
+        snapshot_size = os.path.getsize(self.snapshot_filename) if os.path.exists(self.snapshot_filename) else 0
+        return self.journal_size >= max(self.compact_bytes, snapshot_size)
+
+    @stats.timed("save.order_compact")
+    def compact(self, archive=None, archive_before=None, counters=None, upgrade=None):
+        records = {}
+        statuses = {}
+        archived = []
+        upgraded = {}
+        archive_before = archive_before.encode("utf-8") if archive is not None and archive_before else None
+        archive_statuses = [status.encode("utf-8") for status in ARCHIVE_STATUSES]
+        try:
+            if upgrade is not None:
+                legacy_created = legacy_created_date(self.snapshot_filename).encode("utf-8")
+            if os.path.exists(self.snapshot_filename):
+                with open(self.snapshot_filename, "rb") as file:
+                    for line in file:
+                        if line.strip():
+                            records[line[:line.index(b"|")]] = line
+
+            if os.path.exists(self.filename):
+                with open(self.filename, "rb") as file:
+                    for line in file:
+                        if line.startswith(b"C|"):
+                            records[line[2:line.index(b"|", 2)]] = line[2:]
+                        elif line.startswith(b"S|"):
+                            _, order_id, status = line.rstrip(b"\n").split(b"|", 2)
+                            statuses[order_id] = status
+
+            entries = {}
+            position = 0
+            temp_filename = self.snapshot_filename + ".tmp"
+            with open(temp_filename, "wb") as file:
+                for order_id, line in records.items():
+                    if b"\\" in line and line.count(b"|") >= ORDER_FIELD_COUNT - 1:
+                        fields = ORDER_CODEC.split(line.rstrip(b"\n").decode("utf-8"))
+                        if order_id in statuses:
+                            fields[10] = statuses[order_id].decode("utf-8")
+                            line = (ORDER_CODEC.join(fields) + "\n").encode("utf-8")
+                        fields = [field.encode("utf-8") for field in fields]
+                    else:
+                        fields = line.rstrip(b"\n").split(b"|")
+                        if order_id in statuses:
+                            fields[10] = statuses[order_id]
+                            line = b"|".join(fields) + b"\n"
+                    if upgrade is not None and (len(fields) < ORDER_FIELD_COUNT or not fields[11]):
+                        if len(fields) < ORDER_FIELD_COUNT:
+                            key = (fields[1], fields[2], fields[7], fields[8], fields[9])
+                            prices = upgraded.get(key)
+                            if prices is None:
+                                prices = upgraded[key] = [price.encode("utf-8") for price in
+                                                          upgrade(*(field.decode("utf-8") for field in key))]
+                            fields = [*fields, *[b""] * (12 - len(fields)), *prices]
+                        if not fields[11]:
+                            fields[11] = legacy_created
+                        if b"\\" in line:
+                            line = ORDER_CODEC.join([field.decode("utf-8") for field in fields]) + "\n"
+                            line = line.encode("utf-8")
+                        else:
+                            line = b"|".join(fields) + b"\n"
+                    if (archive_before and fields[10] in archive_statuses and len(fields) > 11
+                            and b"" < fields[11] < archive_before):
+                        archived.append((order_id.decode("utf-8"), fields[11][:7].decode("utf-8"), line))
+                        continue
+                    file.write(line)
+                    entries[order_id.decode("utf-8")] = (position, fields[10].decode("utf-8"),
+                                                         fields[7].decode("utf-8"), fields[3].decode("utf-8"))
+                    position += len(line)
+                file.flush()
+                os.fsync(file.fileno())
+            next_number = 0
+            if archived:
+                archive.append(archived)
+                next_number = max(order_number(order_id) for order_id, _, _ in archived) + 1
+            os.replace(temp_filename, self.snapshot_filename)
+            save_order_index(entries, self.snapshot_filename, self.index_filename, next_number)
+            header = f"#generation={self.generation + 1}\n".encode("utf-8")
+            if counters is not None and counters.generation == self.generation:
+                counters.save(self.generation + 1, len(header))
+            self.generation += 1
+            with open(self.filename, "wb") as file:
+                file.write(header)
+            self.journal_size = len(header)
+            self.snapshot_signature = file_signature(self.snapshot_filename)
+            return entries
+        except Exception as e:
+            print(f"⚠ Error compacting order journal: {e}")
+            return None
+
+
+def legacy_created_date(snapshot_filename):
+    try:
+        created_date = datetime.fromtimestamp(os.path.getmtime(snapshot_filename))
+    except OSError:
+        created_date = datetime.now()
+    return created_date.isoformat(timespec="seconds")
+
+
+ARCHIVE_STATUSES = ("Closed", "Cancelled")
+ARCHIVE_AFTER_DAYS = 90
+
+
+def archive_cutoff(archive_after_days):
+    if archive_after_days is None:
+        return None
+    return (datetime.now() - timedelta(days=archive_after_days)).isoformat(timespec="seconds")
+
+
+class OrderArchive:
+
+    def __init__(self, directory="OrdersArchive"):
+        self.directory = directory
+        self.index_filename = os.path.join(directory, "index.txt")
+        self._months = {}
+        self._index_size = 0
+
+    def segment_filename(self, month):
+        return os.path.join(self.directory, f"Orders-{month}.txt.gz")
+
+    def index(self):
+        try:
+            size = os.path.getsize(self.index_filename)
+        except FileNotFoundError:
+            return self._months
+        if size != self._index_size:
+            with open(self.index_filename, "rb") as file:
+                file.seek(self._index_size)
+                for line in file:
+                    if not line.endswith(b"\n"):
+                        break
+                    self._index_size += len(line)
+                    order_id, month = line.decode("utf-8").rstrip("\n").split("|")
+                    self._months[order_id] = month
+        return self._months
+
+    def __contains__(self, order_id):
+        return order_id in self.index()
+
+    def __len__(self):
+        return len(self.index())
+
+    def segments(self):
+        segments = {}
+        for order_id, month in self.index().items():
+            segments.setdefault(month, set()).add(order_id)
+        return segments
+
+    @stats.timed("save.order_archive")
+    def append(self, records):
+        os.makedirs(self.directory, exist_ok=True)
+        segments = {}
+        for order_id, month, line in records:
+            segments.setdefault(month, []).append(line)
+        for month, lines in segments.items():
+            filename = self.segment_filename(month)
+            with gzip.open(filename, "ab", compresslevel=6) as file:
+                file.write(b"".join(lines))
+            sync_file(filename)
+        with open(self.index_filename, "a", encoding="utf-8") as file:
+            file.write("".join(f"{order_id}|{month}\n" for order_id, month, _ in records))
+            file.flush()
+            os.fsync(file.fileno())
+        stats.count("orders.archived", len(records))
+
+    @stats.timed("load.order_archive")
+    def read(self, order_id):
+        month = self.index().get(order_id)
+        if month is None:
+            return None
+        prefix = order_id + "|"
+        fields = None
+        with gzip.open(self.segment_filename(month), "rt", encoding="utf-8") as file:
+            for line in file:
+                if line.startswith(prefix):
+                    fields = ORDER_CODEC.split(line.rstrip("\n"))
+        return fields
+
+    def records(self):
+        for month, order_ids in sorted(self.segments().items()):
+            latest = {}
+            with gzip.open(self.segment_filename(month), "rt", encoding="utf-8") as file:
+                for line in file:
+                    fields = ORDER_CODEC.split(line.rstrip("\n"))
+                    if fields[0] in order_ids:
+                        latest[fields[0]] = fields
+            yield from latest.values()
+
+
+def load_archived_order(archive, order_id, products, addons):
+    fields = archive.read(order_id)
+    if fields is None:
+        raise KeyError(order_id)
+    return order_from_record(fields, products, addons)
+
+
+def order_counter_deltas(order, sign=1, status=None):
+    status = status or order.status
+    deltas = {f"status:{status}": sign, f"category:{order.product.category}:{status}": sign}
+    if status != "Cancelled":
+        day = order.created_date.date().isoformat()
+        deltas[f"revenue:{day}"] = sign * order.total
+        deltas[f"orders:{day}"] = sign
+        if order.is_delivery:
+            deltas[f"deliveries:{order.delivery_date}"] = sign
+            if order.same_day:
+                deltas[f"same_day:{order.delivery_date}"] = sign
+    return deltas
+
+
+def status_counter_deltas(order, old_status):
+    deltas = order_counter_deltas(order, -1, old_status)
+    merge_counters(deltas, order_counter_deltas(order))
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+def merge_counters(target, deltas):
+    for key, delta in deltas.items():
+        target[key] = target.get(key, 0) + delta
+    return target
+
+
+def counter_lines(deltas):
+    return (ORDER_CODEC.join(("D", key, repr(delta))) for key, delta in (deltas or {}).items())
+
+
+COUNTERS_VERSION = 3
+
+
+class SalesCounters:
+
+    def __init__(self, filename="SalesCounters.txt"):
+        self.filename = filename
+        self.values = {}
+        self.generation = None
+        self.position = 0
+
+    def load(self):
+        self.values = {}
+        self.generation = None
+        self.position = 0
+        try:
+            with open(self.filename, "r", encoding="utf-8") as file:
+                header = dict(part.split("=", 1) for part in file.readline().lstrip("#").split())
+                if int(header.get("version", 1)) != COUNTERS_VERSION:
+                    return self
+                for key, value in CATALOG_CODEC.records(file):
+                    self.values[key] = float(value)
+                self.generation = int(header["generation"])
+                self.position = int(header["position"])
+        except (FileNotFoundError, KeyError, ValueError):
+            self.values = {}
+        return self
+
+    def follows(self, journal, position):
+        return self.generation == journal.generation and position >= self.position
+
+    def add(self, key, delta):
+        self.values[key] = self.values.get(key, 0) + delta
+
+    def apply(self, deltas):
+        merge_counters(self.values, deltas)
+
+    @stats.timed("save.sales_counters")
+    def save(self, generation, position):
+        temp_filename = self.filename + ".tmp"
+        with open(temp_filename, "w", encoding="utf-8") as file:
+            file.write(f"#generation={generation} position={position} version={COUNTERS_VERSION}\n")
+            file.write(CATALOG_CODEC.join_lines((key, repr(value)) for key, value in self.values.items() if value))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_filename, self.filename)
+        self.generation = generation
+        self.position = position
+
+
+DELIVERY_CAPACITY = 40
+SAME_DAY_CAPACITY = 10
+
+
+class DeliveryCapacity:
+
+    def __init__(self, deliveries=DELIVERY_CAPACITY, same_day=SAME_DAY_CAPACITY, filename="DeliveryCapacity.txt"):
+        self.deliveries = deliveries
+        self.same_day = same_day
+        self.filename = filename
+        self.limits = {}
+
+    def load(self):
+        self.limits = {}
+        try:
+            with open(self.filename, "r", encoding="utf-8") as file:
+                for fields in CATALOG_CODEC.records(file):
+                    if len(fields) == 3 and fields[1].isdigit() and fields[2].isdigit():
+                        self.limits[fields[0]] = (int(fields[1]), int(fields[2]))
+        except FileNotFoundError:
+            pass
+        return self
+
+    def limit(self, delivery_date):
+        return self.limits.get(delivery_date, (self.deliveries, self.same_day))
+
+    def remaining(self, delivery_date, booked):
+        deliveries, same_day = self.limit(delivery_date)
+        return (deliveries - int(booked(f"deliveries:{delivery_date}")),
+                same_day - int(booked(f"same_day:{delivery_date}")))
+
+    def error(self, order, booked):
+        if not order.is_delivery:
+            return None
+        deliveries, same_day = self.remaining(order.delivery_date, booked)
+        if deliveries <= 0:
+            return f"No delivery capacity left on {order.delivery_date}"
+        if order.same_day and same_day <= 0:
+            return f"No same-day delivery slots left on {order.delivery_date}"
+        return None
+
+
+def customer_key(customer_name):
+    return customer_name.strip().casefold()
+
+
+find_words = re.compile(r"\w+").findall
+
+
+def contains(sorted_values, value):
+    position = bisect_left(sorted_values, value)
+    return position < len(sorted_values) and sorted_values[position] == value
+
+
+def search_terms(text):
+    return set(find_words(text.casefold()))
+
+
+def order_search_text(customer_name, recipient_name, message, delivery_address):
+    return f"{customer_name} {recipient_name} {message} {delivery_address}"
+
+
+def iter_order_records(filename, prefix="", fields=None):
+    maxsplit = -1 if fields is None else fields
+    try:
+        with open(filename, "r", encoding="utf-8") as file:
+            for line in file:
+                if line.startswith(prefix) and line.endswith("\n") and not line.startswith("#"):
+                    yield split_order_record(line[len(prefix):-1], maxsplit)
+    except FileNotFoundError:
+        pass
+
+
+class SearchIndex:
+
+    def __init__(self):
+        self._postings = {}
+        self._terms = []
+
+    def add(self, doc_id, text):
+        self.add_many(((doc_id, text),))
+
+    def add_many(self, documents):
+        postings_of = self._postings
+        new_terms = []
+        unsorted_terms = set()
+        for doc_id, text in documents:
+            for term in search_terms(text):
+                postings = postings_of.get(term)
+                if postings is None:
+                    postings = postings_of[term] = array("I")
+                    new_terms.append(term)
+                elif postings[-1] > doc_id:
+                    unsorted_terms.add(term)
+                postings.append(doc_id)
+
+        for term in unsorted_terms:
+            postings_of[term] = array("I", sorted(postings_of[term]))
+        if len(new_terms) > 100:
+            self._terms.extend(new_terms)
+            self._terms.sort()
+        else:
+            for term in new_terms:
+                insort(self._terms, term)
+
+    def remove(self, doc_id, text):
+        for term in search_terms(text):
+            postings = self._postings.get(term)
+            if postings is not None and doc_id in postings:
+                postings.remove(doc_id)
+                if not postings:
+                    del self._postings[term]
+                    del self._terms[bisect_left(self._terms, term)]
+
+    def _prefix_postings(self, prefix):
+        start = bisect_left(self._terms, prefix)
+        end = bisect_left(self._terms, prefix + "\U0010ffff", start)
+        if end - start == 1:
+            return self._postings[self._terms[start]]
+        return sorted(set().union(*map(self._postings.__getitem__, self._terms[start:end])))
+
+    def search(self, query, limit=None):
+        matches = sorted(map(self._prefix_postings, search_terms(query)), key=len)
+        if not matches:
+            return []
+
+        result = []
+        for doc_id in reversed(matches[0]):
+            if all(contains(postings, doc_id) for postings in matches[1:]):
+                result.append(doc_id)
+                if len(result) == limit:
+                    break
+        return result
+
+
+SCHEDULED_DELIVERY_STATUSES = ("Open", "Preparing")
+
+
+class OrderStore:
+
+    def __init__(self, products, addons, journal=None, archive=None, archive_after_days=ARCHIVE_AFTER_DAYS,
+                 counters=None, capacity=None):
+        self.products = products
+        self.addons = addons
+        self.journal = journal or OrderJournal()
+        self.archive = archive or OrderArchive()
+        self.counters = counters or SalesCounters()
+        self.capacity = capacity or DeliveryCapacity()
+        self.archive_after_days = archive_after_days
+        self.writer = None
+        self._mutex = threading.RLock()
+        self._orders = {}
+        self._snapshot_offsets = {}
+        self._journal_offsets = {}
+        self._journal_entries = {}
+        self._pending_status = {}
+        self._by_status = None
+        self._by_date = None
+        self._by_customer = None
+        self._due = None
+        self._overdue = {}
+        self._search = None
+
+    @stats.timed("load.order_store")
+    def load(self):
+        with self.journal.lock:
+            next_number = 1
+            if os.path.exists(self.journal.snapshot_filename):
+                self._snapshot_offsets, next_number = load_order_index(self.journal.snapshot_filename,
+                                                                       self.journal.index_filename)
+            self.counters.load()
+            self._journal_entries, self._pending_status = self.journal.scan(counters=self.counters)
+            for order_id, entry in self._journal_entries.items():
+                self._snapshot_offsets.pop(order_id, None)
+                self._journal_offsets[order_id] = entry[0]
+                next_number = max(next_number, order_number(order_id) + 1)
+            Order.order_counter = max(Order.order_counter, next_number)
+
+    def reload(self):
+        self._orders = {}
+        self._snapshot_offsets = {}
+        self._journal_offsets = {}
+        self._journal_entries = {}
+        self._pending_status = {}
+        self._by_status = None
+        self._by_date = None
+        self._by_customer = None
+        self._due = None
+        self._overdue = {}
+        self._search = None
+        self.load()
+
+    @stats.timed("load.order_refresh")
+    def refresh(self):
+        if not self.journal.changed():
+            return False
+        with self.journal.lock:
+            if self.journal.replaced():
+                self.reload()
+                return True
+            created, statuses = self.journal.scan(self.journal.journal_size, self.counters)
+            for order_id, entry in created.items():
+                if order_id in self._orders:
+                    self._unindex(self._orders.pop(order_id))
+                self._snapshot_offsets.pop(order_id, None)
+                self._journal_offsets[order_id] = entry[0]
+                self._journal_entries[order_id] = entry
+                self._index_entry(order_id, *entry[1:])
+                if self._search is not None:
+                    fields = read_order_record(self.journal.filename, entry[0])
+                    self._search.add(order_number(order_id), order_search_text(*fields[3:7]))
+                Order.order_counter = max(Order.order_counter, order_number(order_id) + 1)
+            for order_id, status in statuses.items():
+                self._set_status(order_id, status)
+        return True
+
+    def _set_status(self, order_id, status):
+        order = self._orders.get(order_id)
+        if order is not None:
+            order.status = intern(status)
+            self._schedule(order_id, status, order.delivery_date)
+        elif self._is_hot(order_id):
+            self._pending_status[order_id] = status
+        else:
+            return
+        if self._by_status is not None:
+            for bucket in self._by_status.values():
+                bucket.pop(order_id, None)
+            self._by_status.setdefault(status, {})[order_id] = None
+
+    def _index_columns(self):
+        ids, statuses, dates, customers = [], [], [], []
+        if os.path.exists(self.journal.snapshot_filename):
+            ids, statuses, dates, customers = load_order_index_entries(self.journal.snapshot_filename,
+                                                                       self.journal.index_filename)
+        positions = dict(zip(ids, range(len(ids))))
+
+        for order_id, (_, status, delivery_date, customer_name) in self._journal_entries.items():
+            positions[order_id] = len(ids)
+            ids.append(order_id)
+            statuses.append(status)
+            dates.append(delivery_date)
+            customers.append(customer_name)
+
+        for order_id, status in self._pending_status.items():
+            if order_id in positions:
+                statuses[positions[order_id]] = status
+
+        for order_id, order in self._orders.items():
+            if order_id in positions:
+                statuses[positions[order_id]] = order.status
+            else:
+                ids.append(order_id)
+                statuses.append(order.status)
+                dates.append(order.delivery_date)
+                customers.append(order.customer_name)
+
+        return ids, statuses, dates, customers
+
+    def _status_index(self):
+        if self._by_status is None:
+            ids, statuses, _, _ = self._index_columns()
+            self._by_status = {status: dict.fromkeys(compress(ids, map(status.__eq__, statuses)))
+                               for status in set(statuses)}
+        return self._by_status
+
+    def _date_index(self):
+        if self._by_date is None:
+            ids, _, dates, _ = self._index_columns()
+            self._by_date = {}
+            for order_id, delivery_date in zip(ids, dates):
+                self._by_date.setdefault(delivery_date, []).append(order_id)
+        return self._by_date
+
+    def _customer_index(self):
+        if self._by_customer is None:
+            ids, _, _, customers = self._index_columns()
+            self._by_customer = {}
+            for order_id, key in zip(ids, map(customer_key, customers)):
+                self._by_customer.setdefault(key, []).append(order_id)
+        return self._by_customer
+
+    def _due_index(self):
+        if self._due is None:
+            ids, statuses, dates, _ = self._index_columns()
+            self._due = [(day, order_id) for order_id, status, day in zip(ids, statuses, map(delivery_day, dates))
+                         if day is not None and status in SCHEDULED_DELIVERY_STATUSES]
+            heapify(self._due)
+        return self._due
+
+    def _schedule(self, order_id, status, delivery_date):
+        if self._due is not None and status in SCHEDULED_DELIVERY_STATUSES:
+            day = delivery_day(delivery_date)
+            if day is not None:
+                heappush(self._due, (day, order_id))
+
+    def _index_entry(self, order_id, status, delivery_date, customer_name):
+        self._schedule(order_id, status, delivery_date)
+        if self._by_status is not None:
+            self._by_status.setdefault(status, {})[order_id] = None
+        if self._by_date is not None:
+            self._by_date.setdefault(delivery_date, []).append(order_id)
+        if self._by_customer is not None:
+            self._by_customer.setdefault(customer_key(customer_name), []).append(order_id)
+
+    def _index(self, order):
+        self._index_entry(order.order_id, order.status, order.delivery_date, order.customer_name)
+
+    def _unindex(self, order):
+        if self._search is not None:
+            self._search.remove(order_number(order.order_id), order.search_text())
+        if self._by_status is not None:
+            self._by_status.get(order.status, {}).pop(order.order_id, None)
+        for index, key in ((self._by_date, order.delivery_date),
+                           (self._by_customer, customer_key(order.customer_name))):
+            if index is not None and order.order_id in index.get(key, ()):
+                index[key].remove(order.order_id)
+
+    def _lookup(self, order_ids):
+        return [self[order_id] for order_id in list(order_ids)]
+
+    @stats.timed("filter.with_status")
+    def with_status(self, status):
+        return self._lookup(self._status_index().get(status, ()))
+
+    @stats.timed("filter.page_with_status")
+    def page_with_status(self, status, start, stop):
+        return self._lookup(islice(self._status_index().get(status, ()), start, stop))
+
+    @stats.timed("filter.for_delivery_date")
+    def for_delivery_date(self, delivery_date):
+        return self._lookup(self._date_index().get(delivery_date, ()))
+
+    @stats.timed("filter.for_customer")
+    def for_customer(self, customer_name):
+        return self._lookup(self._customer_index().get(customer_key(customer_name), ()))
+
+    def count_with_status(self, status):
+        return len(self._status_index().get(status, ()))
+
+    def _search_index(self):
+        if self._search is None:
+            self._search = SearchIndex()
+            for filename, prefix, offsets in ((self.journal.snapshot_filename, "", self._snapshot_offsets),
+                                              (self.journal.filename, "C|", self._journal_offsets)):
+                self._search.add_many((order_number(fields[0]), order_search_text(*fields[3:7]))
+                                      for fields in iter_order_records(filename, prefix, 7) if fields[0] in offsets)
+            self._search.add_many((order_number(order_id), order.search_text())
+                                  for order_id, order in list(self._orders.items()))
+        return self._search
+
+    @stats.timed("filter.search")
+    def search(self, query, limit=50):
+        order_ids = map(format_order_id, self._search_index().search(query, limit))
+        return self._lookup([order_id for order_id in order_ids if self._is_hot(order_id)])
+
+    def delivery_queue(self, day=None):
+        delivery_date = (day or datetime.now().date()).strftime("%d/%m/%Y")
+        return [order for order in self.for_delivery_date(delivery_date)
+                if order.is_delivery and order.status != "Cancelled"]
+
+    def _pop_overdue(self, today):
+        due = self._due_index()
+        while due and due[0][0] < today:
+            self._overdue[heappop(due)[1]] = None
+        return due
+
+    def _still_scheduled(self, order_ids):
+        statuses = self._status_index()
+        return [order_id for order_id in order_ids
+                if any(order_id in statuses.get(status, ()) for status in SCHEDULED_DELIVERY_STATUSES)]
+
+    @stats.timed("filter.deliver_due")
+    def deliver_due(self, day=None):
+        today = (day or datetime.now().date()).toordinal()
+        due = self._due_index()
+        if not due or due[0][0] > today:
+            return []
+
+        with self.journal.lock:
+            self.refresh()
+            due = self._pop_overdue(today)
+            order_ids = {}
+            while due and due[0][0] == today:
+                order_ids[heappop(due)[1]] = None
+
+            orders = self._lookup(self._still_scheduled(order_ids))
+            deltas = {}
+            for order in orders:
+                old_status = order.status
+                self._set_status(order.order_id, "Deliver Today")
+                merge_counters(deltas, status_counter_deltas(order, old_status))
+            if self.journal.record_status_many(orders, deltas):
+                self.counters.apply(deltas)
+            self._maybe_compact()
+        return orders
+
+    def overdue_deliveries(self, day=None):
+        with self.journal.lock:
+            self.refresh()
+            self._pop_overdue((day or datetime.now().date()).toordinal())
+            self._overdue = dict.fromkeys(self._still_scheduled(self._overdue))
+            return self._lookup(self._overdue)
+
+    def hydrated_count(self):
+        return len(self._orders)
+
+    def _hydrate(self, order_id):
+        with self._mutex:
+            if order_id in self._journal_offsets:
+                fields = read_order_record(self.journal.filename, self._journal_offsets.pop(order_id))
+            elif order_id in self._snapshot_offsets:
+                fields = read_order_record(self.journal.snapshot_filename, self._snapshot_offsets.pop(order_id))
+            else:
+                raise KeyError(order_id)
+
+        order = order_from_record(fields, self.products, self.addons)
+        stats.count("orders.hydrated")
+        if order_id in self._pending_status:
+            order.status = intern(self._pending_status.pop(order_id))
+        order.store = self
+        self._orders[order_id] = order
+        return order
+
+    def __getitem__(self, order_id):
+        order = self._orders.get(order_id)
+        if order is None:
+            if not self._is_hot(order_id):
+                return load_archived_order(self.archive, order_id, self.products, self.addons)
+            order = self._hydrate(order_id)
+        return order
+
+    def _insert(self, order):
+        while order.order_id in self:
+            order.order_id = Order.next_order_id()
+        self._orders[order.order_id] = order
+        order.store = self
+        self._index(order)
+        if self._search is not None:
+            self._search.add(order_number(order.order_id), order.search_text())
+
+    def add(self, order):
+        return self.add_many([order])
+
+    def __setitem__(self, order_id, order):
+        self.add(order)
+
+    def add_many(self, orders):
+        with self.journal.lock:
+            self.refresh()
+            deltas = {}
+            for order in orders:
+                self._insert(order)
+                merge_counters(deltas, order_counter_deltas(order))
+            saved = self.journal.record_created_many(orders, deltas)
+            if saved:
+                self.counters.apply(deltas)
+            self._maybe_compact()
+        return saved
+
+    def _is_hot(self, order_id):
+        return order_id in self._orders or order_id in self._journal_offsets or order_id in self._snapshot_offsets
+
+    def __contains__(self, order_id):
+        return self._is_hot(order_id) or order_id in self.archive
+
+    def is_archived(self, order_id):
+        return not self._is_hot(order_id) and order_id in self.archive
+
+    def __len__(self):
+        return len(self._orders) + len(self._journal_offsets) + len(self._snapshot_offsets)
+
+    def __iter__(self):
+        yield from list(self._orders)
+        yield from list(self._snapshot_offsets)
+        yield from list(self._journal_offsets)
+
+    def keys(self):
+        return iter(self)
+
+    def get(self, order_id, default=None):
+        if order_id in self:
+            return self[order_id]
+        return default
+
+    def values(self):
+        return [self[order_id] for order_id in list(self)]
+
+    def items(self):
+        return [(order.order_id, order) for order in self.values()]
+
+    def status_changed(self, order, old_status):
+        new_status = order.status
+        with self.journal.lock:
+            order.status = old_status
+            self.refresh()
+            stored_status = self._pending_status.get(order.order_id, self._orders.get(order.order_id, order).status)
+            if stored_status != old_status:
+                order.status = intern(stored_status)
+                return f"Order '{order.order_id}' was changed to '{stored_status}' by another session"
+            order.status = new_status
+            if self._orders.get(order.order_id) is not order:
+                self._snapshot_offsets.pop(order.order_id, None)
+                self._journal_offsets.pop(order.order_id, None)
+                self._pending_status.pop(order.order_id, None)
+                self._orders[order.order_id] = order
+            self._set_status(order.order_id, new_status)
+            deltas = status_counter_deltas(order, old_status)
+            if self.journal.record_status(order, deltas):
+                self.counters.apply(deltas)
+            self._maybe_compact()
+        return None
+
+    def _maybe_compact(self):
+        if self.writer is not None:
+            self.writer.schedule(self.journal.sync)
+            if self.journal.should_compact():
+                self.writer.schedule(self.compact)
+        elif self.journal.should_compact():
+            self.compact()
+
+    def compact(self, force=False):
+        with self.journal.lock, self._mutex:
+            self.refresh()
+            if not force and not self.journal.should_compact():
+                return 0
+            count = len(self)
+            entries = self.journal.compact(self.archive, archive_cutoff(self.archive_after_days), self.counters,
+                                           self._price_fields)
+            if entries is None:
+                return 0
+            for order_id in [order_id for order_id in self._orders if order_id not in entries]:
+                del self._orders[order_id]
+            self._snapshot_offsets = {order_id: entry[0] for order_id, entry in entries.items()
+                                      if order_id not in self._orders}
+            self._journal_offsets = {}
+            self._journal_entries = {}
+            self._pending_status = {}
+            archived = count - len(self)
+            if archived:
+                self._by_status = None
+                self._by_date = None
+                self._by_customer = None
+                self._due = None
+                self._overdue = {}
+                self._search = None
+            return archived
+
+    def archive_orders(self):
+        return self.compact(force=True)
+
+    def _price_fields(self, product_code, addon_code, delivery_date, same_day, is_delivery):
+        product = self.products.get(product_code)
+        addon = self.addons.get(addon_code) if addon_code != "NONE" else None
+        product_price = product.price if product is not None else 0.0
+        addon_price = addon.price if addon is not None else 0.0
+        total = order_total(product_price, addon_price, is_delivery == "True", same_day == "True", delivery_date)
+        return repr(product_price), repr(addon_price), repr(total)
+
+    def has_legacy_orders(self):
+        return any(len(fields) < ORDER_FIELD_COUNT or not fields[11]
+                   for fields in (next(iter_order_records(self.journal.snapshot_filename), ()),
+                                  next(iter_order_records(self.journal.filename, "C|"), ())) if fields)
+
+    def price_legacy_orders(self):
+        if not self.has_legacy_orders():
+            return 0
+        count = len(self)
+        with self.journal.lock:
+            self.counters.generation = None
+            self.compact(force=True)
+        return count
+
+    def _counted_orders(self):
+        yield from list(self._orders.values())
+        for filename, prefix, offsets in ((self.journal.snapshot_filename, "", self._snapshot_offsets),
+                                          (self.journal.filename, "C|", self._journal_offsets)):
+            for fields in iter_order_records(filename, prefix):
+                if fields[0] in offsets:
+                    fields[10] = self._pending_status.get(fields[0], fields[10])
+                    yield order_from_record(fields, self.products, self.addons)
+        for fields in self.archive.records():
+            if not self._is_hot(fields[0]):
+                yield order_from_record(fields, self.products, self.addons)
+
+    @stats.timed("load.sales_counters")
+    def _rebuild_counters(self):
+        self.counters.values = {}
+        for order in self._counted_orders():
+            self.counters.apply(order_counter_deltas(order))
+        self.counters.save(self.journal.generation, self.journal.journal_size)
+
+    def _current_counters(self):
+        self.refresh()
+        if self.counters.generation != self.journal.generation:
+            self._rebuild_counters()
+        return self.counters.values
+
+    def sales_counters(self):
+        with self.journal.lock:
+            return dict(self._current_counters())
+
+    def counter(self, key):
+        with self.journal.lock:
+            return self._current_counters().get(key, 0)
+
+    def capacity_error(self, order):
+        return self.capacity.error(order, self.counter)
+
+    def remaining_capacity(self, delivery_date):
+        return self.capacity.remaining(delivery_date, self.counter)
+
+    def book(self, order):
+        return self.book_many([order])[0]
+
+    def book_many(self, orders):
+        with self.journal.lock:
+            return book_orders(self, orders)
+
+
+@stats.timed("save.book_orders")
+def book_orders(orders, new_orders):
+    pending = {}
+    booked = []
+    errors = []
+    for order in new_orders:
+        error = orders.capacity.error(order, lambda key: orders.counter(key) + pending.get(key, 0))
+        if error is None:
+            merge_counters(pending, order_counter_deltas(order))
+            booked.append(order)
+        errors.append(error)
+    if booked and not orders.add_many(booked):
+        return [error or "Failed to save order" for error in errors]
+    return errors
+
+
+@stats.timed("load.orders")
+def load_orders(products, addons, archive_after_days=ARCHIVE_AFTER_DAYS, capacity=None):
+    orders = OrderStore(products, addons, archive_after_days=archive_after_days, capacity=capacity)
+    try:
+        orders.load()
+        priced = orders.price_legacy_orders()
+        if priced:
+            print(f"✓ Recorded price snapshots on {priced} existing orders")
+        print(f"✓ Loaded {len(orders)} orders successfully")
+    except Exception as e:
+        print(f"⚠ Error loading orders: {e}")
+    return orders
+
+
+class TextStorage:
+
+    def __init__(self, archive_after_days=ARCHIVE_AFTER_DAYS, capacity=None):
+        self.archive_after_days = archive_after_days
+        self.capacity = capacity
+
+    def load_products(self):
+        return load_products()
+
+    def load_addons(self):
+        return load_addons()
+
+    def load_orders(self, products, addons):
+        return load_orders(products, addons, self.archive_after_days, self.capacity)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS products (
+    code TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    price REAL NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS products_category ON products (category);
+CREATE TABLE IF NOT EXISTS addons (
+    code TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    price REAL NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ratings (
+    code TEXT PRIMARY KEY,
+    rating_sum REAL NOT NULL,
+    rating_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS orders (
+    order_id TEXT PRIMARY KEY,
+    number INTEGER NOT NULL,
+    product_code TEXT NOT NULL,
+    addon_code TEXT,
+    customer_name TEXT NOT NULL,
+    customer_key TEXT NOT NULL,
+    recipient_name TEXT NOT NULL,
+    message TEXT NOT NULL,
+    delivery_address TEXT NOT NULL,
+    delivery_date TEXT NOT NULL,
+    delivery_day INTEGER,
+    same_day INTEGER NOT NULL,
+    is_delivery INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    created_date TEXT NOT NULL,
+    product_price REAL,
+    addon_price REAL,
+    total REAL
+);
+CREATE INDEX IF NOT EXISTS orders_status ON orders (status, number);
+CREATE INDEX IF NOT EXISTS orders_delivery_day ON orders (delivery_day);
+CREATE INDEX IF NOT EXISTS orders_customer ON orders (customer_key);
+CREATE TABLE IF NOT EXISTS counters (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+
+SCHEMA_VERSION = 2
+
+
+class Database:
+
+    def __init__(self, filename="BeautifulBlooms.db"):
+        self.filename = filename
+        self.connection = sqlite3.connect(filename, timeout=30, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self._mutex = threading.RLock()
+        self._depth = 0
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        self._mutex.acquire()
+        if self._depth == 0:
+            self.connection.execute("BEGIN IMMEDIATE")
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._depth -= 1
+        try:
+            if self._depth == 0:
+                self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self._mutex.release()
+
+    def execute(self, sql, parameters=()):
+        with self._mutex:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    def executemany(self, sql, rows):
+        with self._mutex:
+            self.connection.executemany(sql, rows)
+
+    def get_meta(self, key, default=0):
+        rows = self.execute("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0][0] if rows else default
+
+    def set_meta(self, key, value):
+        self.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def increment_meta(self, key):
+        self.execute("INSERT INTO meta (key, value) VALUES (?, 1) "
+                     "ON CONFLICT (key) DO UPDATE SET value = value + 1", (key,))
+
+    def close(self):
+        self.connection.close()
+
+
+class SqliteCatalogFile:
+
+    def __init__(self, database, table, columns, parse_row):
+        self.database = database
+        self.table = table
+        self.columns = columns
+        self.parse_row = parse_row
+        self.lock = database
+        self.version = None
+
+    @stats.timed("load.catalog_query")
+    def read(self):
+        with self.database._mutex:
+            rows = self.database.execute(f"SELECT {', '.join(self.columns)} FROM {self.table} ORDER BY rowid")
+            items = {row[0]: self.parse_row(row) for row in rows}
+            return self.generation(), items
+
+    @stats.timed("save.catalog_write")
+    def write(self, items, generation, changed_codes=None):
+        placeholders = ", ".join("?" * len(self.columns))
+        with self.database:
+            if changed_codes is None:
+                rows = [tuple(getattr(item, column) for column in self.columns) for item in items]
+                self.database.execute(f"DELETE FROM {self.table}")
+            else:
+                present = {item.code: item for item in items if item.code in changed_codes}
+                rows = [tuple(getattr(item, column) for column in self.columns) for item in present.values()]
+                self.database.executemany(f"DELETE FROM {self.table} WHERE code = ?",
+                                          [(code,) for code in changed_codes if code not in present])
+            self.database.executemany(f"INSERT OR REPLACE INTO {self.table} ({', '.join(self.columns)}) "
+                                      f"VALUES ({placeholders})", rows)
+            self.database.set_meta(self.table + "_generation", generation)
+
+    def changed(self):
+        return self.generation() != self.version
+
+    def mark_seen(self):
+        self.version = self.generation()
+
+    def invalidate(self):
+        self.version = None
+
+    def generation(self):
+        return self.database.get_meta(self.table + "_generation")
+
+
+class SqliteRatingStore(RatingStore):
+
+    def __init__(self, database):
+        super().__init__()
+        self.database = database
+        self.lock = database
+        self.version = None
+
+    def load(self):
+        with self.database._mutex:
+            self.totals = {code: [rating_sum, rating_count] for code, rating_sum, rating_count
+                           in self.database.execute("SELECT code, rating_sum, rating_count FROM ratings")}
+            self.version = self.database.get_meta("ratings_generation")
+        return self
+
+    def changed(self):
+        return self.database.get_meta("ratings_generation") != self.version
+
+    def refresh(self, products):
+        if not self.changed():
+            return False
+        self.load()
+        for code in list(products):
+            self.apply(products[code])
+            products.item_changed(products[code], persisted=False)
+        return True
+
+    @stats.timed("save.rating")
+    def record(self, product, rating):
+        try:
+            with self.lock:
+                if product.catalog is not None:
+                    self.refresh(product.catalog)
+                self.database.execute("INSERT INTO ratings (code, rating_sum, rating_count) VALUES (?, ?, 1) "
+                                      "ON CONFLICT (code) DO UPDATE SET rating_sum = rating_sum + excluded.rating_sum, "
+                                      "rating_count = rating_count + 1", (product.code, rating))
+                self.database.increment_meta("ratings_generation")
+                self.version = self.database.get_meta("ratings_generation")
+                self._add(product.code, rating)
+                self.apply(product)
+                product._changed(persisted=False)
+        except Exception as e:
+            print(f"⚠ Error saving rating: {e}")
+            return False
+        return True
+
+    def sync(self):
+        pass
+
+    def should_compact(self):
+        return False
+
+
+SQL_ORDER_COLUMNS = ("order_id, product_code, addon_code, customer_name, recipient_name, message, "
+                     "delivery_address, delivery_date, same_day, is_delivery, status, created_date, "
+                     "product_price, addon_price, total")
+SQL_ORDER_VALUES = ", ".join("?" * 18)
+
+
+def order_to_row(order):
+    return (order.order_id, order_number(order.order_id), order.product.code,
+            order.addon.code if order.addon else None, order.customer_name, customer_key(order.customer_name),
+            order.recipient_name, order.message, order.delivery_address, order.delivery_date,
+            delivery_day(order.delivery_date), int(order.same_day), int(order.is_delivery), order.status,
+            order.created_date.isoformat(timespec="seconds"), order.product_price, order.addon_price, order.total)
+
+
+class SqliteOrderStore:
+
+    def __init__(self, database, products, addons, archive=None, archive_after_days=ARCHIVE_AFTER_DAYS,
+                 capacity=None):
+        self.database = database
+        self.products = products
+        self.addons = addons
+        self.archive = archive or OrderArchive(os.path.splitext(database.filename)[0] + "Archive")
+        self.archive_after_days = archive_after_days
+        self.capacity = capacity or DeliveryCapacity()
+        self.writer = None
+        self._search = None
+        self._search_number = 0
+
+    def load(self):
+        number = self.database.execute("SELECT MAX(number) FROM orders")[0][0] or 0
+        number = max(number, self.database.get_meta("archived_order_number"))
+        Order.order_counter = max(Order.order_counter, number + 1)
+
+    def reload(self):
+        self.load()
+
+    def refresh(self):
+        return False
+
+    def hydrated_count(self):
+        return 0
+
+    def _order(self, row):
+        fields = [*row[:2], row[2] or "NONE", *row[3:8], str(bool(row[8])), str(bool(row[9])), *row[10:]]
+        order = order_from_record(fields, self.products, self.addons)
+        order.store = self
+        return order
+
+    def _select(self, where="", parameters=(), limit=-1, offset=0):
+        rows = self.database.execute(f"SELECT {SQL_ORDER_COLUMNS} FROM orders {where} ORDER BY number "
+                                     "LIMIT ? OFFSET ?", (*parameters, limit, offset))
+        stats.count("orders.hydrated", len(rows))
+        return [self._order(row) for row in rows]
+
+    def __getitem__(self, order_id):
+        orders = self._select("WHERE order_id = ?", (order_id,))
+        if not orders:
+            return load_archived_order(self.archive, order_id, self.products, self.addons)
+        return orders[0]
+
+    def _is_hot(self, order_id):
+        return bool(self.database.execute("SELECT 1 FROM orders WHERE order_id = ?", (order_id,)))
+
+    def __contains__(self, order_id):
+        return self._is_hot(order_id) or order_id in self.archive
+
+    def is_archived(self, order_id):
+        return not self._is_hot(order_id) and order_id in self.archive
+
+    def __len__(self):
+        return self.database.execute("SELECT COUNT(*) FROM orders")[0][0]
+
+    def __iter__(self):
+        return iter([row[0] for row in self.database.execute("SELECT order_id FROM orders ORDER BY number")])
+
+    def keys(self):
+        return iter(self)
+
+    def get(self, order_id, default=None):
+        try:
+            return self[order_id]
+        except KeyError:
+            return default
+
+    def values(self):
+        return self._select()
+
+    def items(self):
+        return [(order.order_id, order) for order in self.values()]
+
+    @stats.timed("filter.with_status")
+    def with_status(self, status):
+        return self._select("WHERE status = ?", (status,))
+
+    @stats.timed("filter.page_with_status")
+    def page_with_status(self, status, start, stop):
+        return self._select("WHERE status = ?", (status,), stop - start, start)
+
+    @stats.timed("filter.for_delivery_date")
+    def for_delivery_date(self, delivery_date):
+        day = delivery_day(delivery_date)
+        if day is None:
+            return self._select("WHERE delivery_date = ?", (delivery_date,))
+        return self._select("WHERE delivery_day = ? AND delivery_date = ?", (day, delivery_date))
+
+    @stats.timed("filter.for_customer")
+    def for_customer(self, customer_name):
+        return self._select("WHERE customer_key = ?", (customer_key(customer_name),))
+
+    def count_with_status(self, status):
+        return self.database.execute("SELECT COUNT(*) FROM orders WHERE status = ?", (status,))[0][0]
+
+    def _search_index(self):
+        if self._search is None:
+            self._search = SearchIndex()
+        rows = self.database.execute("SELECT number, customer_name, recipient_name, message, delivery_address "
+                                     "FROM orders WHERE number > ? ORDER BY number", (self._search_number,))
+        if rows:
+            self._search.add_many((number, order_search_text(*fields)) for number, *fields in rows)
+            self._search_number = rows[-1][0]
+        return self._search
+
+    @stats.timed("filter.search")
+    def search(self, query, limit=50):
+        numbers = self._search_index().search(query, limit)
+        if not numbers:
+            return []
+        return self._select(f"WHERE number IN ({', '.join('?' * len(numbers))})", numbers)[::-1]
+
+    def delivery_queue(self, day=None):
+        return self._select("WHERE delivery_day = ? AND is_delivery = 1 AND status != 'Cancelled'",
+                            ((day or datetime.now().date()).toordinal(),))
+
+    @stats.timed("filter.deliver_due")
+    def deliver_due(self, day=None):
+        today = (day or datetime.now().date()).toordinal()
+        where = (f"WHERE delivery_day = ? AND status IN ({', '.join('?' * len(SCHEDULED_DELIVERY_STATUSES))})")
+        parameters = (today, *SCHEDULED_DELIVERY_STATUSES)
+        if not self.database.execute(f"SELECT 1 FROM orders {where} LIMIT 1", parameters):
+            return []
+
+        with self.database:
+            orders = self._select(where, parameters)
+            self.database.execute(f"UPDATE orders SET status = 'Deliver Today' {where}", parameters)
+            deltas = {}
+            for order in orders:
+                old_status = order.status
+                order.status = intern("Deliver Today")
+                merge_counters(deltas, status_counter_deltas(order, old_status))
+            self._record_counters(deltas)
+        return orders
+
+    def overdue_deliveries(self, day=None):
+        where = f"WHERE delivery_day < ? AND status IN ({', '.join('?' * len(SCHEDULED_DELIVERY_STATUSES))})"
+        return self._select(where, ((day or datetime.now().date()).toordinal(), *SCHEDULED_DELIVERY_STATUSES))
+
+    def add(self, order):
+        return self.add_many([order])
+
+    def __setitem__(self, order_id, order):
+        self.add(order)
+
+    @stats.timed("save.orders")
+    def add_many(self, orders):
+        try:
+            with self.database:
+                self.load()
+                for order in orders:
+                    while order.order_id in self:
+                        order.order_id = Order.next_order_id()
+                    order.store = self
+                self.database.executemany(f"INSERT INTO orders VALUES ({SQL_ORDER_VALUES})",
+                                          map(order_to_row, orders))
+                deltas = {}
+                for order in orders:
+                    merge_counters(deltas, order_counter_deltas(order))
+                self._record_counters(deltas)
+        except sqlite3.Error as e:
+            print(f"⚠ Error saving orders: {e}")
+            return False
+        return True
+
+    def status_changed(self, order, old_status):
+        with self.database:
+            rows = self.database.execute("SELECT status FROM orders WHERE order_id = ?", (order.order_id,))
+            if rows and rows[0][0] != old_status:
+                order.status = intern(rows[0][0])
+                return f"Order '{order.order_id}' was changed to '{rows[0][0]}' by another session"
+            self.database.execute("UPDATE orders SET status = ? WHERE order_id = ?", (order.status, order.order_id))
+            self._record_counters(status_counter_deltas(order, old_status))
+        return None
+
+    def _record_counters(self, deltas):
+        self.database.executemany("INSERT INTO counters VALUES (?, ?) "
+                                  "ON CONFLICT (key) DO UPDATE SET value = value + excluded.value", deltas.items())
+
+    @stats.timed("load.sales_counters")
+    def _rebuild_counters(self):
+        deltas = {}
+        for start in range(0, len(self), 10000):
+            for order in self._select("", (), 10000, start):
+                merge_counters(deltas, order_counter_deltas(order))
+        for fields in self.archive.records():
+            if not self._is_hot(fields[0]):
+                merge_counters(deltas, order_counter_deltas(order_from_record(fields, self.products, self.addons)))
+        self.database.execute("DELETE FROM counters")
+        self._record_counters(deltas)
+        self.database.set_meta("counters_version", COUNTERS_VERSION)
+
+    def _check_counters(self):
+        if self.database.get_meta("counters_version") != COUNTERS_VERSION:
+            self._rebuild_counters()
+
+    def sales_counters(self):
+        with self.database:
+            self._check_counters()
+            return dict(self.database.execute("SELECT key, value FROM counters WHERE value != 0"))
+
+    def counter(self, key):
+        with self.database:
+            self._check_counters()
+            rows = self.database.execute("SELECT value FROM counters WHERE key = ?", (key,))
+        return rows[0][0] if rows else 0
+
+    def capacity_error(self, order):
+        return self.capacity.error(order, self.counter)
+
+    def remaining_capacity(self, delivery_date):
+        return self.capacity.remaining(delivery_date, self.counter)
+
+    def book(self, order):
+        return self.book_many([order])[0]
+
+    def book_many(self, orders):
+        with self.database:
+            return book_orders(self, orders)
+
+    def price_legacy_orders(self):
+        if self.database.get_meta("orders_priced"):
+            return 0
+        count = 0
+        with self.database:
+            while True:
+                orders = self._select("WHERE total IS NULL", (), 10000)
+                if not orders:
+                    break
+                self.database.executemany("UPDATE orders SET product_price = ?, addon_price = ?, total = ? "
+                                          "WHERE order_id = ?", [(order.product_price, order.addon_price,
+                                                                  order.total, order.order_id) for order in orders])
+                count += len(orders)
+            self.database.set_meta("orders_priced", 1)
+        return count
+
+    def archive_orders(self):
+        cutoff = archive_cutoff(self.archive_after_days)
+        if cutoff is None:
+            return 0
+        where = f"WHERE status IN ({', '.join('?' * len(ARCHIVE_STATUSES))}) AND created_date < ?"
+        parameters = (*ARCHIVE_STATUSES, cutoff)
+        with self.database:
+            orders = self._select(where, parameters)
+            if not orders:
+                return 0
+            self.archive.append([(order.order_id, order.created_date.strftime("%Y-%m"),
+                                  (order_to_record(order) + "\n").encode("utf-8")) for order in orders])
+            self.database.execute(f"DELETE FROM orders {where}", parameters)
+            self.database.set_meta("archived_order_number",
+                                   max(self.database.get_meta("archived_order_number"),
+                                       *(order_number(order.order_id) for order in orders)))
+        if self._search is not None:
+            for order in orders:
+                self._search.remove(order_number(order.order_id), order.search_text())
+        return len(orders)
+
+
+class SqliteStorage:
+
+    def __init__(self, filename="BeautifulBlooms.db", archive_after_days=ARCHIVE_AFTER_DAYS, capacity=None):
+        self.database = Database(filename)
+        self.archive = OrderArchive(os.path.splitext(filename)[0] + "Archive")
+        self.archive_after_days = archive_after_days
+        self.capacity = capacity
+        if not self.database.get_meta("schema_version"):
+            self.migrate()
+        if self.database.get_meta("schema_version") < SCHEMA_VERSION:
+            self.upgrade()
+
+    def migrate(self):
+        if not any(os.path.exists(name) for name in ("Products.txt", "Addons.txt", "Orders.txt", "OrdersJournal.txt")):
+            defaults = [("ADD001", "Chocolates", 8.0, "Available"),
+                        ("ADD002", "Customized Handwritten card", 12.0, "Available"),
+                        ("ADD003", "Soft Toy", 16.0, "Available")]
+            with self.database:
+                if not self.database.get_meta("schema_version"):
+                    self.database.executemany("INSERT INTO addons VALUES (?, ?, ?, ?)", defaults)
+                    self.database.set_meta("schema_version", SCHEMA_VERSION)
+            return
+
+        print(f"Importing text data files into {self.database.filename}...")
+        products = load_products()
+        addons = load_addons()
+        orders = load_orders(products, addons)
+        with self.database:
+            if self.database.get_meta("schema_version"):
+                return
+            self.database.set_meta("schema_version", SCHEMA_VERSION)
+            SqliteCatalogFile(self.database, "products", PRODUCT_COLUMNS, product_from_row).write(
+                products.values(), products.generation)
+            SqliteCatalogFile(self.database, "addons", ADDON_COLUMNS, addon_from_row).write(
+                addons.values(), addons.generation)
+            self.database.executemany("INSERT INTO ratings VALUES (?, ?, ?)",
+                                      [(code, *totals) for code, totals in products.ratings.totals.items()])
+            order_ids = list(orders)
+            for start in range(0, len(order_ids), 10000):
+                self.database.executemany(f"INSERT INTO orders VALUES ({SQL_ORDER_VALUES})",
+                                          [order_to_row(orders[order_id])
+                                           for order_id in order_ids[start:start + 10000]])
+            if len(orders.archive):
+                shutil.copytree(orders.archive.directory, self.archive.directory, dirs_exist_ok=True)
+                self.database.set_meta("archived_order_number", max(map(order_number, orders.archive.index())))
+        print(f"✓ Imported {len(products)} products, {len(addons)} add-ons and {len(order_ids)} orders")
+
+    def upgrade(self):
+        with self.database:
+            if self.database.get_meta("schema_version") < 2:
+                for column in ("product_price", "addon_price", "total"):
+                    self.database.execute(f"ALTER TABLE orders ADD COLUMN {column} REAL")
+            self.database.set_meta("schema_version", SCHEMA_VERSION)
+
+    def load_products(self):
+        catalog_file = SqliteCatalogFile(self.database, "products", PRODUCT_COLUMNS, product_from_row)
+        generation, products = catalog_file.read()
+        print(f"✓ Loaded {len(products)} products successfully")
+        return ProductCatalog(products, SqliteRatingStore(self.database).load(), catalog_file, generation)
+
+    def load_addons(self):
+        catalog_file = SqliteCatalogFile(self.database, "addons", ADDON_COLUMNS, addon_from_row)
+        generation, addons = catalog_file.read()
+        print(f"✓ Loaded {len(addons)} add-ons successfully")
+        return Catalog(addons, catalog_file, generation)
+
+    def load_orders(self, products, addons):
+        orders = SqliteOrderStore(self.database, products, addons, self.archive, self.archive_after_days,
+                                  self.capacity)
+        orders.load()
+        priced = orders.price_legacy_orders()
+        if priced:
+            print(f"✓ Recorded price snapshots on {priced} existing orders")
+        archived = orders.archive_orders()
+        if archived:
+            print(f"✓ Archived {archived} finished orders")
+        print(f"✓ Loaded {len(orders)} orders successfully")
+        return orders
+
+
+PRODUCT_COLUMNS = ("code", "name", "category", "price", "status")
+ADDON_COLUMNS = ("code", "name", "price", "status")
+
+
+def product_from_row(row):
+    return Product(*row)
+
+
+def addon_from_row(row):
+    return Addon(*row)
+
+
+def open_storage(kind="text", database="BeautifulBlooms.db", archive_after_days=ARCHIVE_AFTER_DAYS, capacity=None):
+    if kind == "sqlite":
+        return SqliteStorage(database, archive_after_days, capacity)
+    return TextStorage(archive_after_days, capacity)
+
+
+STARTUP_BUDGET = 0.2
+PRELOAD_WAIT = STARTUP_BUDGET / 2
+
+
+class LazyLoad:
+
+    def __init__(self, load):
+        self._load = load
+        self._value = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    self._value = self._load()
+        return self._value
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+    def __len__(self):
+        return len(self.get())
+
+    def __iter__(self):
+        return iter(self.get())
+
+    def __contains__(self, key):
+        return key in self.get()
+
+    def __getitem__(self, key):
+        return self.get()[key]
+
+    def __setitem__(self, key, value):
+        self.get()[key] = value
+
+    def __delitem__(self, key):
+        del self.get()[key]
+
+
+def preload(*collections):
+    def run():
+        for collection in collections:
+            try:
+                collection.get()
+            except Exception:
+                return
+
+    thread = threading.Thread(target=run, name="blooms-preload", daemon=True)
+    thread.start()
+    return thread
+
+
+def open_session(storage, writer=None):
+    def products_loader():
+        products = storage.load_products()
+        products.writer = products.ratings.writer = writer
+        return products
+
+    def addons_loader():
+        addons = storage.load_addons()
+        addons.writer = writer
+        return addons
+
+    def orders_loader():
+        orders = storage.load_orders(products.get(), addons.get())
+        orders.writer = writer
+        return orders
+
+    products = LazyLoad(products_loader)
+    addons = LazyLoad(addons_loader)
+    orders = LazyLoad(orders_loader)
+    return products, addons, orders
+
+
 def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
 
@@ -242,6 +2898,75 @@ def print_menu(title, options):
     print("-" * 60)
 
 
+PAGE_SIZE = 10
+PAGE_COMMANDS = {"n": 1, "p": -1}
+PRODUCT_HEADER = (f"\n{'Code':<10} {'Name':<25} {'Category':<15} {'Price':<10} {'Status'}", "-" * 80)
+
+
+def write_lines(lines):
+    sys.stdout.write("".join(f"{line}\n" for line in lines))
+    sys.stdout.flush()
+
+
+def page_bounds(count, page, page_size=PAGE_SIZE):
+    pages = max(-(-count // page_size), 1)
+    page = min(max(page, 0), pages - 1)
+    return page, pages, page * page_size
+
+
+def page_footer(page, pages, count):
+    return f"Page {page + 1}/{pages} of {count} - n: next page, p: previous page"
+
+
+def browse(count, fetch, format_rows, header=()):
+    page = 0
+    while True:
+        page, pages, start = page_bounds(count, page)
+        footer = [page_footer(page, pages, count) + ", g<number>: go to page"] if pages > 1 else []
+        write_lines([*header, *format_rows(fetch(start, start + PAGE_SIZE)), *footer])
+        if pages == 1:
+            return None
+
+        command = input("Page (or press Enter to continue): ").strip().lower()
+        if command in PAGE_COMMANDS:
+            page += PAGE_COMMANDS[command]
+        elif command[:1] == "g" and command[1:].isascii() and command[1:].isdigit() and 1 <= int(command[1:]) <= pages:
+            page = int(command[1:]) - 1
+        else:
+            return command
+
+
+def product_lines(products):
+    for product in products:
+        yield str(product)
+
+
+def order_lines(orders):
+    for order in orders:
+        yield f"Order ID: {order.order_id}"
+        yield f"Customer: {order.customer_name} | Recipient: {order.recipient_name}"
+        yield f"Product: {order.product.name} | Total: ${order.total:.2f}"
+        yield f"Status: {order.status}"
+        if order.is_delivery:
+            yield f"Delivery: {order.delivery_date} to {order.delivery_address}"
+        yield "-" * 80
+
+
+def delivery_lines(orders):
+    for order in orders:
+        yield (f"{order.order_id} | {order.status:<13} | {order.delivery_date} | {order.recipient_name} | "
+               f"{order.delivery_address}")
+
+
+def search_result_lines(orders):
+    for order in orders:
+        yield f"{order.order_id} | {order.status:<13} | {order.customer_name} -> {order.recipient_name}"
+        if order.is_delivery:
+            yield f"    Delivery: {order.delivery_date} to {order.delivery_address}"
+        if order.message:
+            yield f"    Message: {order.message}"
+
+
 def get_valid_input(prompt, valid_options=None, input_type=str):
     while True:
         try:
@@ -264,35 +2989,37 @@ def get_valid_input(prompt, valid_options=None, input_type=str):
             return None
 
 
-def generate_unique_code(prefix, existing_codes):
-    counter = 1
-    while True:
-        code = f"{prefix}{counter:03d}"
-        if code not in existing_codes:
-            return code
-        counter += 1
-
 def view_update_blooms(products):
     print_header("VIEW / UPDATE BLOOMS")
+    products.refresh()
 
     if not products:
         print("⚠ No products available")
         input("\nPress Enter to continue...")
         return
 
-    print(f"\n{'Code':<10} {'Name':<25} {'Category':<15} {'Price':<10} {'Status'}")
-    print("-" * 80)
-    for product in products.values():
-        print(product)
-
-    print("\n" + "-" * 60)
-    code = input("To update an item, enter the item code (or 0 to go back): ").strip().upper()
+    query = browse(len(products), lambda start, stop: list(islice(products.values(), start, stop)), product_lines,
+                   PRODUCT_HEADER)
+    if not query:
+        print("\n" + "-" * 60)
+        query = input("To update an item, enter the item code or search words (or 0 to go back): ").strip()
 
-    if code == "0":
+    if query == "0":
         return
 
+    code = query.upper()
+    if code not in products:
+        matches = products.search(query)
+        if len(matches) == 1:
+            code = matches[0].code
+        elif matches:
+            print(f"\n{len(matches)} products match '{query}':")
+            for product in matches:
+                print(product)
+            code = input("\nEnter the item code: ").strip().upper()
+
     if code not in products:
-        print(f"⚠ Product code '{code}' not found!")
+        print(f"⚠ No product matches '{query}'!")
         input("\nPress Enter to continue...")
         return
 
@@ -332,6 +3059,7 @@ def view_update_blooms(products):
 
 def add_new_bloom(products):
     print_header("ADD NEW BLOOM")
+    products.refresh()
 
     name = input("Enter product name: ").strip()
     if not name:
@@ -383,7 +3111,7 @@ def add_new_bloom(products):
             "Anniversary": "A"
         }
         prefix = prefix_map[category]
-        code = generate_unique_code(prefix, products.keys())
+        code = products.codes.allocate(prefix)
         print(f"\n✓ Generated code: {code}")
 
     new_product = Product(code, name, category, price, "Available")
@@ -399,6 +3127,7 @@ def add_new_bloom(products):
 
 def view_update_addons(addons):
     print_header("VIEW / UPDATE ADD-ONS")
+    addons.refresh()
 
     if not addons:
         print("⚠ No add-ons available")
@@ -457,6 +3186,7 @@ def view_update_addons(addons):
 
 def add_new_addon(addons):
     print_header("ADD NEW ADD-ON")
+    addons.refresh()
 
     name = input("Enter add-on name: ").strip()
     if not name:
@@ -469,7 +3199,7 @@ def add_new_addon(addons):
     choice = get_valid_input("Choose option: ", ["1", "2"])
 
     if choice == "1":
-        code = generate_unique_code("ADD", addons.keys())
+        code = addons.codes.allocate("ADD")
         print(f"\n✓ Generated code: {code}")
     else:
         code = input("Enter add-on code: ").strip().upper()
@@ -526,49 +3256,82 @@ def inventory_management_menu(products, addons):
         elif choice == "5":
             break
 
-def display_products(products, category_filter=None, sort_by_price=False, sort_by_rating=False):
-    filtered_products = [p for p in products.values() if p.status == "Available"]
+@stats.timed("render.products")
+def product_page(products, category, sort_by, start, stop):
+    return list(product_lines(products.available(category, sort_by, start, stop)))
 
-    if category_filter:
-        filtered_products = [p for p in filtered_products if p.category == category_filter]
 
-    if sort_by_price:
-        filtered_products.sort(key=lambda x: x.price)
-    elif sort_by_rating:
-        filtered_products.sort(key=lambda x: x.rating, reverse=True)
+def display_products(products, category_filter=None, sort_by_price=False, sort_by_rating=False):
+    category = category_filter or None
+    sort_by = "price" if sort_by_price else "rating" if sort_by_rating else None
+    count = products.count_available(category, sort_by)
 
-    if not filtered_products:
+    if not count:
         print("\n⚠ No products available")
-        return False
+        return None
+
+    return browse(count, lambda start, stop: product_page(products, category, sort_by, start, stop), iter,
+                  PRODUCT_HEADER) or ""
+
 
-    print(f"\n{'Code':<10} {'Name':<25} {'Category':<15} {'Price':<10} {'Status'}")
-    print("-" * 80)
-    for product in filtered_products:
-        print(product)
+ORDER_TRANSITIONS = {
+    "Open": ["Cancelled", "Preparing"],
+    "Cancelled": ["Open"],
+    "Preparing": ["Ready"],
+    "Ready": ["Preparing", "Closed"],
+    "Deliver Today": ["Ready", "Closed"],
+    "Closed": []
+}
+STATUS_ACTIONS = {"Cancelled": "Cancel order", "Open": "Set back to Open"}
 
-    return True
+
+def typed_item_code(products, command):
+    item_code = (command or "").upper()
+    return item_code if item_code in products else None
+
+
+def validate_item_code(products, item_code):
+    if item_code not in products:
+        return f"Invalid item code '{item_code}'"
+    if products[item_code].status != "Available":
+        return f"Item '{item_code}' is not available"
+    return None
+
+
+def validate_addon_code(addons, addon_code):
+    if addon_code not in addons or addons[addon_code].status != "Available":
+        return f"Invalid addon code '{addon_code}'"
+    return None
 
 
 def create_order(products, addons, orders):
     print_header("CREATE ORDER")
+    products.refresh()
+    addons.refresh()
 
     selected_product = None
 
     while True:
-        has_products = display_products(products)
+        command = display_products(products)
 
-        if not has_products:
+        if command is None:
             input("\nPress Enter to continue...")
             return
 
-        print("\n" + "-" * 60)
-        print("1. Filter products by category")
-        print("2. Sort products by price")
-        print("3. Sort products by rating (BONUS)")
-        print("4. Order item")
-        print("0. Back to main menu")
+        item_code = typed_item_code(products, command)
+        if item_code:
+            choice = "4"
+        elif command in ("0", "1", "2", "3", "4"):
+            choice = command
+        else:
+            print("\n" + "-" * 60)
+            print("1. Filter products by category")
+            print("2. Sort products by price")
+            print("3. Sort products by rating (BONUS)")
+            print("4. Order item")
+            print("0. Back to main menu")
 
-        choice = get_valid_input("\nEnter option: ", ["0", "1", "2", "3", "4"])
+            choice = get_valid_input("\nEnter option: ", ["0", "1", "2", "3", "4"])
 
         if choice == "0":
             return
@@ -586,13 +3349,16 @@ def create_order(products, addons, orders):
                 continue
 
             category = categories[int(cat_choice) - 1]
-            display_products(products, category_filter=category)
+            item_code = typed_item_code(products, display_products(products, category_filter=category))
 
-            print("\n1. Order item")
-            print("2. Back to filter category")
-            print("3. Back to main menu")
+            if item_code:
+                sub_choice = "1"
+            else:
+                print("\n1. Order item")
+                print("2. Back to filter category")
+                print("3. Back to main menu")
 
-            sub_choice = get_valid_input("\nEnter option: ", ["1", "2", "3"])
+                sub_choice = get_valid_input("\nEnter option: ", ["1", "2", "3"])
 
             if sub_choice == "1":
                 choice = "4"
@@ -602,12 +3368,15 @@ def create_order(products, addons, orders):
                 continue
 
         elif choice == "2":
-            display_products(products, sort_by_price=True)
+            item_code = typed_item_code(products, display_products(products, sort_by_price=True))
 
-            print("\n1. Order item")
-            print("2. Back to main menu")
+            if item_code:
+                sub_choice = "1"
+            else:
+                print("\n1. Order item")
+                print("2. Back to main menu")
 
-            sub_choice = get_valid_input("\nEnter option: ", ["1", "2"])
+                sub_choice = get_valid_input("\nEnter option: ", ["1", "2"])
 
             if sub_choice == "1":
                 choice = "4"
@@ -615,12 +3384,15 @@ def create_order(products, addons, orders):
                 return
 
         elif choice == "3":
-            display_products(products, sort_by_rating=True)
+            item_code = typed_item_code(products, display_products(products, sort_by_rating=True))
 
-            print("\n1. Order item")
-            print("2. Back to main menu")
+            if item_code:
+                sub_choice = "1"
+            else:
+                print("\n1. Order item")
+                print("2. Back to main menu")
 
-            sub_choice = get_valid_input("\nEnter option: ", ["1", "2"])
+                sub_choice = get_valid_input("\nEnter option: ", ["1", "2"])
 
             if sub_choice == "1":
                 choice = "4"
@@ -628,15 +3400,12 @@ def create_order(products, addons, orders):
                 return
 
         if choice == "4":
-            item_code = input("\nPlease enter item code: ").strip().upper()
-
-            if item_code not in products:
-                print(f"⚠ Invalid item code '{item_code}'")
-                input("\nPress Enter to continue...")
-                continue
+            if not item_code:
+                item_code = input("\nPlease enter item code: ").strip().upper()
 
-            if products[item_code].status != "Available":
-                print(f"⚠ Item '{item_code}' is not available")
+            error = validate_item_code(products, item_code)
+            if error:
+                print(f"⚠ {error}")
                 input("\nPress Enter to continue...")
                 continue
 
@@ -654,7 +3423,7 @@ def create_order(products, addons, orders):
     selected_addon = None
 
     if addon_code != "0":
-        if addon_code in addons and addons[addon_code].status == "Available":
+        if validate_addon_code(addons, addon_code) is None:
             selected_addon = addons[addon_code]
         else:
             print("⚠ Invalid addon code. Proceeding without addon.")
@@ -673,7 +3442,15 @@ def create_order(products, addons, orders):
 
     if is_delivery:
         delivery_address = input("Delivery address: ").strip()
-        delivery_date = input("Delivery date (DD/MM/YYYY): ").strip()
+        while True:
+            delivery_date = canonical_delivery_date(input("Delivery date (DD/MM/YYYY): ").strip())
+            if delivery_date is not None:
+                break
+            print("⚠ Invalid delivery date (expected DD/MM/YYYY)")
+
+        deliveries_left, same_day_left = orders.remaining_capacity(delivery_date)
+        print(f"Delivery slots left on {delivery_date}: {max(deliveries_left, 0)} "
+              f"({max(same_day_left, 0)} same-day)")
 
         same_day_choice = input("Same day delivery? (Y/N): ").strip().upper()
         same_day = same_day_choice == "Y"
@@ -696,8 +3473,11 @@ def create_order(products, addons, orders):
     confirm = input("Enter 1 to confirm, 2 to edit info, 0 to cancel: ").strip()
 
     if confirm == "1":
-        orders[new_order.order_id] = new_order
-        save_orders(orders)
+        error = orders.book(new_order)
+        if error:
+            print(f"\n⚠ {error}. Please choose another delivery date.")
+            input("\nPress Enter to continue...")
+            return
         print(f"\n✓ Order {new_order.order_id} created successfully!")
 
         rate_choice = input("\nWould you like to rate this product? (Y/N): ").strip().upper()
@@ -705,10 +3485,7 @@ def create_order(products, addons, orders):
             try:
                 rating = float(input("Enter rating (1-5): ").strip())
                 if 1 <= rating <= 5:
-                    selected_product.rating_count += 1
-                    total = selected_product.rating * (selected_product.rating_count - 1) + rating
-                    selected_product.rating = total / selected_product.rating_count
-                    save_products(products)
+                    products.ratings.record(selected_product, rating)
                     print("✓ Thank you for your rating!")
             except:
                 print("⚠ Invalid rating")
@@ -730,31 +3507,32 @@ def view_orders(orders, products):
         return
 
     filter_status = "Open"
+    page = 0
 
     while True:
-        filtered_orders = [o for o in orders.values() if o.status == filter_status]
-
-        if not filtered_orders:
-            print(f"\n⚠ No orders with status '{filter_status}'")
+        orders.refresh()
+        delivered_today = orders.deliver_due()
+        if delivered_today:
+            print(f"\n✓ {len(delivered_today)} order(s) due for delivery moved to 'Deliver Today'")
+        count = orders.count_with_status(filter_status)
+        page, pages, start = page_bounds(count, page)
+        page_orders = orders.page_with_status(filter_status, start, start + PAGE_SIZE)
+
+        if not page_orders:
+            lines = [f"\n⚠ No orders with status '{filter_status}'"]
         else:
-            print(f"\nOrders with status: {filter_status}")
-            print("-" * 80)
-            for order in filtered_orders:
-                print(f"Order ID: {order.order_id}")
-                print(f"Customer: {order.customer_name} | Recipient: {order.recipient_name}")
-                print(f"Product: {order.product.name} | Total: ${order.calculate_total():.2f}")
-                print(f"Status: {order.status}")
-                if order.is_delivery:
-                    print(f"Delivery: {order.delivery_date} to {order.delivery_address}")
-                print("-" * 80)
-
-        print("\n1. Edit/Cancel order")
-        print("2. Filter order by status")
-        print("3. Back to main menu")
-
-        choice = get_valid_input("\nEnter option: ", ["1", "2", "3"])
+            lines = [f"\nOrders with status: {filter_status}", "-" * 80, *order_lines(page_orders)]
+            if pages > 1:
+                lines.append(page_footer(page, pages, count))
+        write_lines([*lines, "\n1. Edit/Cancel order", "2. Filter order by status", "3. Today's delivery queue",
+                     "4. Search orders", "5. Back to main menu"])
 
-        if choice == "1":
+        choice = get_valid_input("\nEnter option: ", ["1", "2", "3", "4", "5", *PAGE_COMMANDS])
+
+        if choice in PAGE_COMMANDS:
+            page += PAGE_COMMANDS[choice]
+
+        elif choice == "1":
             order_id = input("\nEnter order ID: ").strip().upper()
 
             if order_id not in orders:
@@ -766,15 +3544,12 @@ def view_orders(orders, products):
             print(f"\nOrder ID: {order.order_id}")
             print(f"Current Status: {order.status}")
 
-            status_options = {
-                "Open": ["Cancel order", "Change to Preparing"],
-                "Cancelled": ["Set back to Open"],
-                "Preparing": ["Change to Ready"],
-                "Ready": ["Change to Preparing", "Change to Closed"],
-                "Closed": []
-            }
+            if orders.is_archived(order_id):
+                print("\n⚠ This order is archived and can no longer be changed")
+                input("\nPress Enter to continue...")
+                continue
 
-            options = status_options.get(order.status, [])
+            options = ORDER_TRANSITIONS.get(order.status, [])
 
             if not options:
                 print("\n⚠ No status change options available for closed orders")
@@ -783,7 +3558,7 @@ def view_orders(orders, products):
 
             print("\nAvailable actions:")
             for i, option in enumerate(options, 1):
-                print(f"{i}. {option}")
+                print(f"{i}. {STATUS_ACTIONS.get(option, f'Change to {option}')}")
             print("0. Go back")
 
             action = get_valid_input("\nSelect action: ",
@@ -792,40 +3567,20 @@ def view_orders(orders, products):
             if action == "0":
                 continue
 
-            action_idx = int(action) - 1
-            selected_action = options[action_idx]
-
-            if "Cancel" in selected_action:
-                order.update_status("Cancelled")
-                print("✓ Order cancelled")
-            elif "Preparing" in selected_action:
-                order.update_status("Preparing")
-                print("✓ Order status changed to Preparing")
-            elif "Ready" in selected_action:
-                order.update_status("Ready")
-                print("✓ Order status changed to Ready")
-            elif "Closed" in selected_action:
-                order.update_status("Closed")
-                print("✓ Order status changed to Closed")
-            elif "Open" in selected_action:
-                order.update_status("Open")
-                print("✓ Order status changed to Open")
-
-
-            if order.is_delivery and order.delivery_date:
-                try:
-                    delivery_dt = datetime.strptime(order.delivery_date, "%d/%m/%Y")
-                    today = datetime.now().date()
-                    if delivery_dt.date() == today and order.status != "Ready":
-                        print("⚠ ALERT: This order is scheduled for delivery TODAY!")
-                        auto_change = input("Change status to 'Deliver Today'? (Y/N): ").strip().upper()
-                        if auto_change == "Y":
-                            order.update_status("Deliver Today")
-                            print("✓ Status updated to 'Deliver Today'")
-                except:
-                    pass
-
-            save_orders(orders)
+            new_status = options[int(action) - 1]
+            error = orders.capacity_error(order) if order.status == "Cancelled" else None
+            if not error:
+                error = order.update_status(new_status)
+                if error:
+                    error += "; no change made"
+            if error:
+                print(f"⚠ {error}")
+            elif new_status == "Cancelled":
+                print("✓ Order cancelled" + (f", delivery slot on {order.delivery_date} released"
+                                             if order.is_delivery else ""))
+            else:
+                print(f"✓ Order status changed to {new_status}")
+
             input("\nPress Enter to continue...")
 
         elif choice == "2":
@@ -849,55 +3604,326 @@ def view_orders(orders, products):
             }
 
             filter_status = status_map[status_choice]
+            page = 0
 
         elif choice == "3":
+            queue = orders.delivery_queue()
+            overdue = orders.overdue_deliveries()
+            header = f"\nDeliveries for {datetime.now().strftime('%d/%m/%Y')}: {len(queue)}"
+            if overdue:
+                header += f" (plus {len(overdue)} overdue, listed last)"
+            queue += overdue
+            if browse(len(queue), lambda start, stop: queue[start:stop], delivery_lines, (header, "-" * 80)) is None:
+                input("\nPress Enter to continue...")
+
+        elif choice == "4":
+            query = input("\nSearch customer, recipient, address or message: ").strip()
+            results = orders.search(query) if query else []
+            if browse(len(results), lambda start, stop: results[start:stop], search_result_lines,
+                      (f"\n{len(results)} matching order(s)" + (" (newest first)" if results else ""),
+                       "-" * 80)) is None:
+                input("\nPress Enter to continue...")
+
+        elif choice == "5":
             break
 
 
+def dashboard_lines(counters, today, days=7):
+    lines = []
+    for offset in range(days):
+        day = today - timedelta(days=offset)
+        lines.append(f"{day.strftime('%d/%m/%Y'):<14} ${counters.get(f'revenue:{day.isoformat()}', 0):>11.2f} "
+                     f"{int(counters.get(f'orders:{day.isoformat()}', 0)):>8}")
+
+    lines += ["", f"{'Status':<20} {'Orders':>8}", "-" * 60]
+    lines += [f"{status:<20} {int(counters.get(f'status:{status}', 0)):>8}" for status in ORDER_TRANSITIONS]
+
+    open_orders = {}
+    for key, value in counters.items():
+        if key.startswith("category:"):
+            category, status = key[9:].rsplit(":", 1)
+            if status not in ARCHIVE_STATUSES:
+                open_orders[category] = open_orders.get(category, 0) + value
+    lines += ["", f"{'Open by category':<20} {'Orders':>8}", "-" * 60]
+    lines += [f"{category:<20} {int(value):>8}" for category, value in sorted(open_orders.items()) if value]
+    return lines
+
+
+def sales_dashboard(orders):
+    print_header("SALES DASHBOARD")
+    orders.refresh()
+    orders.deliver_due()
+    counters = orders.sales_counters()
+    today = datetime.now().date()
+    revenue = counters.get(f"revenue:{today.isoformat()}", 0)
+    order_count = int(counters.get(f"orders:{today.isoformat()}", 0))
+    same_day = int(counters.get(f"same_day:{today.strftime('%d/%m/%Y')}", 0))
+    write_lines([f"Today's revenue: ${revenue:.2f} from {order_count} orders",
+                 f"Same-day deliveries today: {same_day}",
+                 "", f"{'Day':<14} {'Revenue':>12} {'Orders':>8}", "-" * 60, *dashboard_lines(counters, today)])
+    input("\nPress Enter to continue...")
+
+
 def sales_management_menu(products, addons, orders):
     while True:
         print_menu("@@@@ SALES MANAGEMENT @@@@", {
             "1": "Create Order",
             "2": "View Orders",
-            "3": "Back to Main Menu"
+            "3": "Sales Dashboard",
+            "4": "Back to Main Menu"
         })
 
-        choice = get_valid_input("Enter option: ", ["1", "2", "3"])
+        choice = get_valid_input("Enter option: ", ["1", "2", "3", "4"])
 
         if choice == "1":
             create_order(products, addons, orders)
         elif choice == "2":
             view_orders(orders, products)
         elif choice == "3":
+            sales_dashboard(orders)
+        elif choice == "4":
+            break
+
+def parse_flag(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().upper() in ("Y", "YES", "TRUE", "1", "D")
+
+
+def order_from_import_row(products, addons, row):
+    row = {key: "" if value is None else value for key, value in row.items()}
+    item_code = str(row.get("item_code", "")).strip().upper()
+    error = validate_item_code(products, item_code)
+    if error:
+        raise ValueError(error)
+
+    addon_code = str(row.get("addon_code") or "0").strip().upper()
+    selected_addon = None
+    if addon_code not in ("", "0", "NONE"):
+        error = validate_addon_code(addons, addon_code)
+        if error:
+            raise ValueError(error)
+        selected_addon = addons[addon_code]
+
+    is_delivery = parse_flag(row.get("delivery", "P"))
+    delivery_address = ""
+    delivery_date = ""
+    same_day = False
+
+    if is_delivery:
+        delivery_address = str(row.get("delivery_address", "")).strip()
+        delivery_date = str(row.get("delivery_date", "")).strip()
+        same_day = parse_flag(row.get("same_day", "N"))
+        if not delivery_address:
+            raise ValueError("Delivery address is required for delivery orders")
+        if canonical_delivery_date(delivery_date) is None:
+            raise ValueError(f"Invalid delivery date '{delivery_date}' (expected DD/MM/YYYY)")
+        delivery_date = canonical_delivery_date(delivery_date)
+
+    return Order(
+        product=products[item_code],
+        addon=selected_addon,
+        customer_name=str(row.get("customer_name", "")).strip(),
+        recipient_name=str(row.get("recipient_name", "")).strip(),
+        message=str(row.get("message", "")).strip()[:300],
+        delivery_address=delivery_address,
+        delivery_date=delivery_date,
+        same_day=same_day,
+        is_delivery=is_delivery
+    )
+
+
+def read_import_rows(filename):
+    with open(filename, "r", encoding="utf-8", newline="") as file:
+        if filename.lower().endswith((".jsonl", ".json")):
+            for line_number, line in enumerate(file, 1):
+                if line.strip():
+                    try:
+                        row = json.loads(line)
+                    except ValueError as e:
+                        yield line_number, e
+                        continue
+                    if not isinstance(row, dict):
+                        row = ValueError(f"expected an object, got {type(row).__name__}")
+                    yield line_number, row
+        else:
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, row
+
+
+def import_orders(filename, products, addons, orders):
+    new_orders = []
+    line_numbers = []
+    errors = []
+
+    for line_number, row in read_import_rows(filename):
+        if isinstance(row, Exception):
+            errors.append((line_number, f"Invalid JSON: {row}"))
+            continue
+        try:
+            new_orders.append(order_from_import_row(products, addons, row))
+            line_numbers.append(line_number)
+        except ValueError as e:
+            errors.append((line_number, str(e)))
+
+    booked = []
+    if new_orders:
+        for line_number, order, error in zip(line_numbers, new_orders, orders.book_many(new_orders)):
+            if error is None:
+                booked.append(order)
+            else:
+                errors.append((line_number, error))
+        errors.sort()
+
+    return booked, errors
+
+
+def run_import(filename, storage=None):
+    storage = storage or TextStorage()
+    products = storage.load_products()
+    addons = storage.load_addons()
+    orders = storage.load_orders(products, addons)
+
+    try:
+        new_orders, errors = import_orders(filename, products, addons, orders)
+    except FileNotFoundError:
+        print(f"⚠ Import file '{filename}' not found")
+        return 1
+
+    print(f"\n✓ Imported {len(new_orders)} orders, total ${sum(o.total for o in new_orders):.2f}")
+
+    if errors:
+        report_filename = filename + ".errors.txt"
+        with open(report_filename, "w", encoding="utf-8") as file:
+            for line_number, message in errors:
+                file.write(f"line {line_number}: {message}\n")
+        print(f"⚠ {len(errors)} rows rejected, see {report_filename}")
+        for line_number, message in errors[:10]:
+            print(f"  line {line_number}: {message}")
+
+    return 1 if errors else 0
+
+
+def run_archive(storage=None):
+    storage = storage or TextStorage()
+    orders = storage.load_orders(storage.load_products(), storage.load_addons())
+    archived = orders.archive_orders()
+    print(f"✓ Archived {archived} closed or cancelled orders older than {storage.archive_after_days} days")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Beautiful Blooms Management System")
+    parser.add_argument("--import", dest="import_file", metavar="FILE",
+                        help="import orders from a CSV or JSONL file and exit")
+    parser.add_argument("--archive", action="store_true",
+                        help="move finished orders older than --archive-after days into the archive and exit")
+    parser.add_argument("--load-on-demand", dest="background", action="store_false",
+                        help="read each data file when it is first needed instead of in the background at startup")
+    add_storage_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def add_storage_arguments(parser):
+    parser.add_argument("--storage", choices=["text", "sqlite"], default="text",
+                        help="persistence backend (default: text files)")
+    parser.add_argument("--database", default="BeautifulBlooms.db", metavar="FILE",
+                        help="SQLite database file for --storage sqlite")
+    parser.add_argument("--archive-after", type=int, default=ARCHIVE_AFTER_DAYS, metavar="DAYS",
+                        help=f"archive closed and cancelled orders older than DAYS (default: {ARCHIVE_AFTER_DAYS})")
+    parser.add_argument("--delivery-capacity", type=int, default=DELIVERY_CAPACITY, metavar="N",
+                        help=f"deliveries that can be booked per date (default: {DELIVERY_CAPACITY}); "
+                             "DeliveryCapacity.txt lines 'DD/MM/YYYY,deliveries,same_day' override single dates")
+    parser.add_argument("--same-day-capacity", type=int, default=SAME_DAY_CAPACITY, metavar="N",
+                        help=f"same-day deliveries that can be booked per date (default: {SAME_DAY_CAPACITY})")
+
+
+def storage_capacity(args):
+    return DeliveryCapacity(args.delivery_capacity, args.same_day_capacity).load()
+
+
+def stats_menu(orders):
+    while True:
+        print_header("PERFORMANCE STATS")
+
+        if not stats.enabled:
+            print("⚠ Instrumentation is off. Start the app with BLOOMS_STATS=1 to collect timings.")
+        elif not stats.timings and not stats.counters:
+            print("No activity recorded yet")
+        else:
+            print(f"{'Operation':<28} {'Calls':>8} {'Total ms':>11} {'Avg ms':>9} {'Max ms':>9}")
+            print("-" * 69)
+            for name, (calls, total, longest) in sorted(stats.timings.items(), key=lambda item: -item[1][1]):
+                print(f"{name:<28} {calls:>8} {total * 1000:>11.2f} {total / calls * 1000:>9.3f} "
+                      f"{longest * 1000:>9.3f}")
+            if stats.counters:
+                print("-" * 69)
+                for name, value in sorted(stats.counters.items()):
+                    print(f"{name:<28} {value:>8}")
+
+        date_cache = delivery_date_info.cache_info()
+        print("-" * 69)
+        print(f"Orders: {len(orders)} ({orders.hydrated_count()} in memory, {len(orders.archive)} archived)")
+        print(f"Delivery date cache: {date_cache.hits} hits / {date_cache.misses} misses")
+        if os.environ.get("BLOOMS_PROFILE"):
+            print(f"Profiling this session to: {os.environ['BLOOMS_PROFILE']}")
+
+        print("\n1. Reset stats")
+        print("2. Back to main menu")
+        choice = get_valid_input("\nEnter option: ", ["1", "2"])
+        if choice == "1":
+            stats.reset()
+            print("✓ Stats reset")
+        else:
             break
 
-def main():
+
+def main(storage=None, background=True):
+    started = perf_counter()
+    storage = storage or TextStorage()
     print("=" * 60)
     print(f"{'BEAUTIFUL BLOOMS MANAGEMENT SYSTEM':^60}")
     print(f"{'Initializing...':^60}")
     print("=" * 60)
 
-    products = load_products()
-    addons = load_addons()
-    orders = {}
+    writer = WriteBehind()
+    products, addons, orders = open_session(storage, writer)
+    if background:
+        preload(products, addons, orders).join(max(PRELOAD_WAIT - (perf_counter() - started), 0))
+    if stats.enabled:
+        stats.record("startup", perf_counter() - started)
+    try:
+        print("\n✓ System initialized successfully!")
+        input("\nPress Enter to continue to main menu...")
+        main_menu(products, addons, orders)
+    except KeyboardInterrupt:
+        print("\n\n⚠ Interrupted")
+    finally:
+        if writer.close():
+            print("✓ All changes saved")
+        else:
+            print("⚠ Some changes could not be saved")
 
-    print("\n✓ System initialized successfully!")
-    input("\nPress Enter to continue to main menu...")
 
+def main_menu(products, addons, orders):
     while True:
         print_menu("@@@@ BEAUTIFUL BLOOMS @@@@", {
             "1": "Inventory Management",
             "2": "Sales Management",
-            "3": "Exit"
+            "3": "Admin: Performance Stats",
+            "4": "Exit"
         })
 
-        choice = get_valid_input("Enter option: ", ["1", "2", "3"])
+        choice = get_valid_input("Enter option: ", ["1", "2", "3", "4"])
 
         if choice == "1":
             inventory_management_menu(products, addons)
         elif choice == "2":
             sales_management_menu(products, addons, orders)
         elif choice == "3":
+            stats_menu(orders)
+        elif choice == "4":
             print("\n" + "=" * 60)
             print(f"{'Thank you for using Beautiful Blooms!':^60}")
             print(f"{'Goodbye!':^60}")
@@ -906,4 +3932,20 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    args = parse_args()
+    storage = open_storage(args.storage, args.database, args.archive_after, storage_capacity(args))
+    if args.import_file:
+        sys.exit(run_import(args.import_file, storage))
+    if args.archive:
+        sys.exit(run_archive(storage))
+
+    profile_filename = os.environ.get("BLOOMS_PROFILE")
+    if profile_filename:
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(main, storage, args.background)
+        finally:
+            profiler.dump_stats(profile_filename)
+            print(f"✓ Profile written to {profile_filename}")
+    else:
+        main(storage, args.background)
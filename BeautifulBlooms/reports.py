@@ -0,0 +1,196 @@
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import gzip
+import json
+import os
+
+from main import (ORDER_CODEC, ORDER_FIELD_COUNT, OrderArchive, OrderJournal, file_signature, load_addons,
+                  load_products, order_total)
+
+REPORT_DIMENSIONS = ("day", "category", "product")
+
+
+def empty_report():
+    return {dimension: {} for dimension in REPORT_DIMENSIONS}
+
+
+def record_total(fields, product_prices, addon_prices):
+    if len(fields) >= ORDER_FIELD_COUNT and fields[14]:
+        return float(fields[14])
+    return order_total(product_prices.get(fields[1], (None, 0.0))[1],
+                       addon_prices.get(fields[2], 0.0) if fields[2] != "NONE" else 0.0,
+                       fields[9] == "True", fields[8] == "True", fields[7])
+
+
+def add_record(report, fields, status, product_prices, addon_prices):
+    if status == "Cancelled":
+        return
+    total = record_total(fields, product_prices, addon_prices)
+    has_addon = fields[2] != "NONE"
+    keys = (
+        ("day", fields[11][:10] if len(fields) > 11 and fields[11] else "unknown"),
+        ("category", product_prices.get(fields[1], ("Unknown", 0.0))[0] or "Unknown"),
+        ("product", fields[1])
+    )
+    for dimension, key in keys:
+        row = report[dimension].get(key)
+        if row is None:
+            row = report[dimension][key] = [0.0, 0, 0]
+        row[0] += total
+        row[1] += 1
+        row[2] += has_addon
+
+
+def merge_reports(target, source):
+    for dimension, rows in source.items():
+        target_rows = target[dimension]
+        for key, (revenue, units, addon_units) in rows.items():
+            row = target_rows.get(key)
+            if row is None:
+                target_rows[key] = [revenue, units, addon_units]
+            else:
+                row[0] += revenue
+                row[1] += units
+                row[2] += addon_units
+    return target
+
+
+def report_chunk(filename, start, end, statuses, product_prices, addon_prices):
+    report = empty_report()
+    with open(filename, "rb") as file:
+        file.seek(start)
+        if start > 0:
+            file.seek(start - 1)
+            if file.read(1) != b"\n":
+                file.readline()
+        position = file.tell()
+        while position < end:
+            line = file.readline()
+            if not line:
+                break
+            position += len(line)
+            line = line.decode("utf-8").rstrip("\n")
+            if not line or line.startswith("#"):
+                continue
+            fields = ORDER_CODEC.split(line)
+            add_record(report, fields, statuses.get(fields[0], fields[10]), product_prices, addon_prices)
+    return report
+
+
+def report_segment(filename, order_ids, product_prices, addon_prices):
+    latest = {}
+    with gzip.open(filename, "rt", encoding="utf-8") as file:
+        for line in file:
+            fields = ORDER_CODEC.split(line.rstrip("\n"))
+            if fields[0] in order_ids:
+                latest[fields[0]] = fields
+
+    report = empty_report()
+    for fields in latest.values():
+        add_record(report, fields, fields[10], product_prices, addon_prices)
+    return report
+
+
+def file_chunks(filename, chunk_bytes):
+    size = os.path.getsize(filename) if os.path.exists(filename) else 0
+    return [(start, min(start + chunk_bytes, size)) for start in range(0, size, chunk_bytes)]
+
+
+def read_journal(journal_filename):
+    created = {}
+    statuses = {}
+    try:
+        with open(journal_filename, "r", encoding="utf-8") as file:
+            for line in file:
+                line = line.rstrip("\n")
+                if line.startswith("C|"):
+                    fields = ORDER_CODEC.split(line[2:])
+                    created[fields[0]] = fields
+                elif line.startswith("S|"):
+                    _, order_id, status = line.split("|", 2)
+                    statuses[order_id] = status
+    except FileNotFoundError:
+        pass
+    return created, statuses
+
+
+def build_sales_report(products, addons, journal=None, archive=None, workers=None, chunk_bytes=8 * 1024 * 1024):
+    journal = journal or OrderJournal()
+    archive = archive or OrderArchive()
+    product_prices = {code: (product.category, product.price) for code, product in products.items()}
+    addon_prices = {code: addon.price for code, addon in addons.items()}
+
+    while True:
+        with journal.lock:
+            signature = file_signature(journal.snapshot_filename)
+            segments = archive.segments()
+        created, statuses = read_journal(journal.filename)
+        snapshot_statuses = {order_id: status for order_id, status in statuses.items() if order_id not in created}
+        report = empty_report()
+
+        tasks = [(report_chunk, (journal.snapshot_filename, start, end, snapshot_statuses, product_prices,
+                                 addon_prices))
+                 for start, end in file_chunks(journal.snapshot_filename, chunk_bytes)]
+        tasks += [(report_segment, (archive.segment_filename(month), order_ids, product_prices, addon_prices))
+                  for month, order_ids in sorted(segments.items())]
+        if len(tasks) > 1 and workers != 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for future in [executor.submit(function, *args) for function, args in tasks]:
+                    merge_reports(report, future.result())
+        else:
+            for function, args in tasks:
+                merge_reports(report, function(*args))
+
+        for order_id, fields in created.items():
+            add_record(report, fields, statuses.get(order_id, fields[10]), product_prices, addon_prices)
+
+        if file_signature(journal.snapshot_filename) == signature:
+            return report
+
+
+def print_sales_report(report):
+    for dimension in REPORT_DIMENSIONS:
+        print("\n" + "=" * 72)
+        print(f"{'SALES BY ' + dimension.upper():^72}")
+        print("=" * 72)
+        print(f"{dimension.title():<20} {'Revenue':>14} {'Units':>10} {'Add-ons':>10} {'Attach rate':>14}")
+        print("-" * 72)
+        for key, (revenue, units, addon_units) in sorted(report[dimension].items()):
+            attach_rate = addon_units / units * 100 if units else 0.0
+            print(f"{key:<20} ${revenue:>13.2f} {units:>10} {addon_units:>10} {attach_rate:>13.1f}%")
+
+
+def report_to_json(report):
+    return {
+        dimension: {
+            key: {
+                "revenue": round(revenue, 2),
+                "units": units,
+                "addon_units": addon_units,
+                "addon_attach_rate": round(addon_units / units, 4) if units else 0.0
+            }
+            for key, (revenue, units, addon_units) in sorted(rows.items())
+        }
+        for dimension, rows in report.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Beautiful Blooms sales report")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--chunk-mb", type=int, default=8, help="size of each order-file chunk in MB")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    products = load_products()
+    addons = load_addons()
+    report = build_sales_report(products, addons, workers=args.workers, chunk_bytes=args.chunk_mb * 1024 * 1024)
+
+    if args.json:
+        print(json.dumps(report_to_json(report), indent=2))
+    else:
+        print_sales_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+from datetime import date
+
+import pytest
+
+from main import Addon, Catalog, DeliveryCapacity, OrderStore, Product, ProductCatalog, order_from_import_row
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    products = ProductCatalog({"R001": Product("R001", "Angel Eyes", "Romantic", 128)})
+    addons = Catalog({"ADD001": Addon("ADD001", "Chocolates", 8.0)})
+    orders = OrderStore(products, addons, archive_after_days=None, capacity=DeliveryCapacity(1, 1))
+    orders.load()
+    return orders
+
+
+def delivery_row(delivery_date):
+    return {"item_code": "R001", "delivery": "D", "delivery_address": "1 Orchard Road",
+            "delivery_date": delivery_date}
+
+
+def test_unpadded_delivery_dates_share_one_day(store):
+    padded = order_from_import_row(store.products, store.addons, delivery_row("14/02/2027"))
+    unpadded = order_from_import_row(store.products, store.addons, delivery_row("14/2/2027"))
+    assert unpadded.delivery_date == "14/02/2027"
+
+    errors = store.book_many([padded, unpadded])
+    assert errors == [None, "No delivery capacity left on 14/02/2027"]
+    assert [order.order_id for order in store.delivery_queue(date(2027, 2, 14))] == [padded.order_id]
+    assert store.remaining_capacity("14/02/2027") == (0, 1)
+
+
+def test_unparseable_delivery_dates_are_rejected(store):
+    with pytest.raises(ValueError):
+        order_from_import_row(store.products, store.addons, delivery_row("soon"))
@@ -0,0 +1,38 @@
+from main import Product, WriteBehind, load_products
+
+
+def add_bloom(products, name):
+    code = products.codes.allocate("R")
+    products[code] = Product(code, name, "Romantic", 100)
+    return code
+
+
+def test_concurrent_new_codes_get_reassigned(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    first, second = load_products(), load_products()
+    assert add_bloom(first, "Angel Eyes") == add_bloom(second, "Red Rose") == "R001"
+    first.save()
+    second.save()
+
+    assert "'Red Rose' is now R002" in capsys.readouterr().out
+    assert {code: product.name for code, product in load_products().items()} == {"R001": "Angel Eyes",
+                                                                                 "R002": "Red Rose"}
+    assert second["R001"].name == "Angel Eyes"
+
+
+def test_background_save_does_not_overwrite_another_sessions_code(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    first, second = load_products(), load_products()
+    second.writer = writer = WriteBehind(delay=60)
+    add_bloom(first, "Angel Eyes")
+    add_bloom(second, "Red Rose")
+    second.save_later()
+    first.save()
+
+    writer.flush()
+    assert load_products()["R001"].name == "Angel Eyes"
+
+    second.refresh()
+    assert writer.close()
+    assert {code: product.name for code, product in load_products().items()} == {"R001": "Angel Eyes",
+                                                                                 "R002": "Red Rose"}
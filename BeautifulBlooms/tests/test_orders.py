@@ -0,0 +1,49 @@
+from datetime import date
+
+import pytest
+
+from main import Product, load_products, open_storage, order_from_import_row
+
+
+@pytest.fixture(params=["text", "sqlite"])
+def sessions(request, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    products = load_products()
+    products["R001"] = Product("R001", "Angel Eyes", "Romantic", 128)
+    products.save()
+    first = open_storage(request.param, archive_after_days=None)
+    second = open_storage(request.param, archive_after_days=None)
+    products, addons = first.load_products(), first.load_addons()
+    orders = first.load_orders(products, addons)
+    order = order_from_import_row(products, addons, {"item_code": "R001"})
+    assert orders.book(order) is None
+    return orders, second.load_orders(second.load_products(), second.load_addons()), order.order_id
+
+
+def test_stale_status_change_is_rejected(sessions):
+    first, second, order_id = sessions
+    stale = second[order_id]
+    assert first[order_id].update_status("Cancelled") is None
+
+    error = stale.update_status("Preparing")
+    assert error == f"Order '{order_id}' was changed to 'Cancelled' by another session"
+    assert stale.status == "Cancelled"
+    first.refresh()
+    assert first[order_id].status == "Cancelled"
+
+
+def delivery_row(delivery_date):
+    return {"item_code": "R001", "delivery": "D", "delivery_address": "1 Orchard Road",
+            "delivery_date": delivery_date}
+
+
+def test_only_todays_deliveries_move_to_deliver_today(sessions):
+    orders, _, _ = sessions
+    overdue, due = (order_from_import_row(orders.products, orders.addons, delivery_row(delivery_date))
+                    for delivery_date in ("10/01/2030", "11/01/2030"))
+    assert orders.book_many([overdue, due]) == [None, None]
+
+    assert [order.order_id for order in orders.deliver_due(date(2030, 1, 11))] == [due.order_id]
+    assert orders[due.order_id].status == "Deliver Today"
+    assert [(order.order_id, order.status) for order in orders.overdue_deliveries(date(2030, 1, 11))] == [
+        (overdue.order_id, "Open")]
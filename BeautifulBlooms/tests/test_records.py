@@ -0,0 +1,120 @@
+from datetime import datetime
+import os
+
+import pytest
+
+from main import (CATALOG_CODEC, ORDER_CODEC, Addon, Catalog, Order, Product, ProductCatalog, OrderStore,
+                  load_orders, load_products)
+
+AWKWARD_FIELDS = [
+    ["plain", "text", ""],
+    ["pipe | inside", "comma, inside", "back\\slash"],
+    ["multi\nline", "carriage\rreturn", "trailing\\"],
+    ["\\|", "|\\", "\\n is not a newline"],
+    ["", "", ""],
+]
+
+
+@pytest.mark.parametrize("codec", [ORDER_CODEC, CATALOG_CODEC])
+@pytest.mark.parametrize("fields", AWKWARD_FIELDS)
+def test_join_split_round_trip(codec, fields):
+    line = codec.join(fields)
+    assert "\n" not in line and "\r" not in line
+    assert codec.split(line) == fields
+
+
+@pytest.mark.parametrize("codec", [ORDER_CODEC, CATALOG_CODEC])
+def test_join_lines_round_trip(codec):
+    text = codec.join_lines(AWKWARD_FIELDS)
+    assert text.count("\n") == len(AWKWARD_FIELDS)
+    assert [codec.split(line) for line in text.splitlines()] == AWKWARD_FIELDS
+
+
+def test_plain_records_are_written_unescaped():
+    rows = [["R001", "Angel Eyes", "Romantic"], ["R002", "Red Rose", "Romantic"]]
+    assert ORDER_CODEC.join(rows[0]) == "R001|Angel Eyes|Romantic"
+    assert ORDER_CODEC.join_lines(rows) == "R001|Angel Eyes|Romantic\nR002|Red Rose|Romantic\n"
+    assert list(ORDER_CODEC.records(ORDER_CODEC.join_lines(rows).splitlines(True))) == rows
+
+
+def test_records_skip_blank_and_comment_lines():
+    lines = ["#generation=3\n", "\n", CATALOG_CODEC.join(["R001", "a, b", "c"]) + "\n"]
+    assert list(CATALOG_CODEC.records(lines)) == [["R001", "a, b", "c"]]
+
+
+@pytest.fixture
+def catalogs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    products = ProductCatalog({"R001": Product("R001", "Angel Eyes", "Romantic", 128)})
+    addons = Catalog({"ADD001": Addon("ADD001", "Chocolates", 8.0)})
+    return products, addons
+
+
+def order_state(order):
+    return (order.order_id, order.product.code, order.addon.code if order.addon else None, order.customer_name,
+            order.recipient_name, order.message, order.delivery_address, order.delivery_date, order.same_day,
+            order.is_delivery, order.status, order.created_date.isoformat(timespec="seconds"),
+            order.product_price, order.addon_price, order.total)
+
+
+def make_orders(products, addons):
+    created_date = datetime(2026, 3, 2, 9, 30)
+    return [
+        Order(products["R001"], addons["ADD001"], "Ann | Lee", "Bob\\Smith", "Happy\nbirthday,\r\nlove", "",
+              "", False, False, created_date=created_date),
+        Order(products["R001"], None, "Cy", "Di", "Get well soon", "1 Orchard | Road", "20/03/2026", True, True,
+              created_date=created_date),
+        Order(products["R001"], None, "Eve", "Fay", "plain", "", "", False, False, created_date=created_date),
+    ]
+
+
+def test_compaction_round_trip(catalogs):
+    products, addons = catalogs
+    store = OrderStore(products, addons, archive_after_days=None)
+    store.load()
+    orders = make_orders(products, addons)
+    assert store.add_many(orders)
+    orders[1].status = "Preparing"
+    store.status_changed(orders[1], "Open")
+    expected = sorted(map(order_state, orders))
+    counters = store.sales_counters()
+
+    store.compact(force=True)
+    assert os.path.getsize("OrdersJournal.txt") == len("#generation=1\n")
+
+    reloaded = OrderStore(products, addons, archive_after_days=None)
+    reloaded.load()
+    assert sorted(map(order_state, reloaded.values())) == expected
+    assert reloaded.sales_counters() == counters
+    assert [order.order_id for order in reloaded.with_status("Preparing")] == [orders[1].order_id]
+
+
+def test_legacy_records_get_prices_and_a_fixed_created_date(catalogs):
+    products, addons = catalogs
+    with open("Orders.txt", "w", encoding="utf-8") as file:
+        file.write("BBO-25-0001|R001|ADD001|Ann|Bob|Hi|||False|False|Open\n")
+        file.write("BBO-25-0002|R001|NONE|Cy|Di|Saved in C:\\new\\records|||False|False|Closed\n")
+    modified = datetime(2026, 1, 5, 12, 0).timestamp()
+    os.utime("Orders.txt", (modified, modified))
+
+    orders = load_orders(products, addons, archive_after_days=None)
+    first, second = orders["BBO-25-0001"], orders["BBO-25-0002"]
+    assert (first.product_price, first.addon_price, first.total) == (128.0, 8.0, 136.0)
+    assert second.message == "Saved in C:\\new\\records"
+    assert first.created_date == second.created_date == datetime(2026, 1, 5, 12, 0)
+    assert orders.sales_counters()["revenue:2026-01-05"] == 264.0
+
+    reloaded = load_orders(products, addons, archive_after_days=None)
+    assert sorted(map(order_state, reloaded.values())) == sorted(map(order_state, orders.values()))
+    assert reloaded["BBO-25-0002"].message == "Saved in C:\\new\\records"
+
+
+def test_legacy_catalog_lines_are_plain_text(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open("Products.txt", "w", encoding="utf-8") as file:
+        file.write("R001,Blooms\\new,Romantic,128,Available\n")
+    products = load_products()
+    assert products["R001"].name == "Blooms\\new"
+
+    products.save()
+    assert load_products()["R001"].name == "Blooms\\new"
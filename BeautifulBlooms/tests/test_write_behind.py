@@ -0,0 +1,34 @@
+import os
+
+from main import Product, WriteBehind, load_products
+
+
+def test_failed_background_save_is_retried_on_close(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    products = load_products()
+    products["R001"] = Product("R001", "Angel Eyes", "Romantic", 128)
+    products.save()
+    products.writer = writer = WriteBehind(delay=0)
+
+    os.mkdir("Products.txt.tmp")
+    products["R001"].update_price(99)
+    products.save_later()
+    writer.flush()
+    os.rmdir("Products.txt.tmp")
+
+    assert writer.close()
+    assert load_products()["R001"].price == 99
+
+
+def test_close_reports_a_save_that_still_fails(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    products = load_products()
+    products["R001"] = Product("R001", "Angel Eyes", "Romantic", 128)
+    products.save()
+    products.writer = writer = WriteBehind(delay=0)
+
+    os.mkdir("Products.txt.tmp")
+    products["R001"].update_price(99)
+    products.save_later()
+
+    assert not writer.close()